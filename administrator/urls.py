@@ -10,6 +10,8 @@ urlpatterns = [
     path('preview_course/<int:learner_id>/<int:course_id>/', views.preview_course, name='administrator_preview_course'),
 
     path('upload_course/', views.upload_course, name='upload_course'),
+    path('course_batch_import/', views.course_batch_import, name='course_batch_import'),
+    path('course_batch_import/<int:batch_id>/report/', views.course_batch_import_report, name='course_batch_import_report'),
     path('leaderboard/', views.leaderboard, name='administrator_leaderboard'),
     path('settings/', views.administrator_settings,   name='administrator_settings'),
 
@@ -27,6 +29,7 @@ urlpatterns = [
     path('course_delivery/<int:pk>/list/', views.course_delivery_list, name='course_delivery_list'),
     path('course_delivery/<int:pk>/create/', views.CourseDeliveryCreateView.as_view(), name='course_delivery_create'),
     path('course_delivery/<int:course_id>/<str:delivery_id>/', views.course_delivery_detail, name='course_delivery_detail'),
+    path('course_delivery/<int:delivery_id>/enroll/', views.enroll_delivery_participants, name='enroll_delivery_participants'),
     path('export_attendance/<int:delivery_id>/', views.export_attendance, name='export_attendance'),
 
     path('support/', views.support, name='administrator_support'),
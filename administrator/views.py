@@ -17,6 +17,7 @@ from django.db import IntegrityError, transaction
 from django.forms import ValidationError
 from django.http import HttpResponse, HttpResponseServerError, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.http import require_POST
 from django.views import View
 from django.views.generic.edit import CreateView
 from django.views.generic import ListView
@@ -27,8 +28,10 @@ from django.db.models import Q
 from accounts.forms import UserTimeZoneForm
 from accounts.models import Learner, Supervisor
 from administrator.forms import AdminNameForm, AdminEmailForm, AdminProfilePictureForm
+from courses import services as course_services
+from courses.batch_import import write_report
 from courses.forms import CourseDeliveryForm, ScormCloudCourseForm
-from courses.models import Attendance, CourseDelivery, Enrollment, Feedback, ScormCloudCourse, ScormCloudRegistration
+from courses.models import Attendance, BulkEnrollmentJob, CourseBatchImport, CourseDelivery, Enrollment, Feedback, ScormCloudCourse, ScormCloudRegistration
 from learner.forms import LearnerForm
 from supervisor.forms import SupervisorForm
 from multitenancy.models import TenantRequest
@@ -76,88 +79,47 @@ def course_list(request):
 
 @login_required
 def upload_course(request):
-    domain = django_settings.DOMAIN_NAME
     if request.method == 'POST':
         form = ScormCloudCourseForm(request.POST, request.FILES)
         if form.is_valid():
-            course_id = form.cleaned_data['course_id']
+            # Reserved only now, so concurrent uploads never share an id
+            course_id = course_services.allocate_course_ids()[0]
             file = form.cleaned_data['file']
 
-            category = form.cleaned_data.get('category', '')
-            duration = form.cleaned_data.get('duration', '')
-            short_description = form.cleaned_data.get('short_description', '')
-            long_description = form.cleaned_data.get('long_description', '')
+            course_fields = {
+                'category': form.cleaned_data.get('category', ''),
+                'duration': form.cleaned_data.get('duration', ''),
+                'short_description': form.cleaned_data.get('short_description', ''),
+                'long_description': form.cleaned_data.get('long_description', ''),
+            }
             cover_image = form.cleaned_data.get('cover_image', '')
 
-            files = {'file': file}
-
             try:
-                response = requests.post(
-                    f'{domain}/api/create_course/{course_id}/',
-                    files=files,
-                    timeout=300,
+                # The import runs in the course job worker, which also registers
+                # the administrator as a learner once the course exists.
+                job = course_services.queue_course_import(
+                    course_id,
+                    file,
+                    course_fields=course_fields,
+                    cover_image=cover_image,
+                    published_by=request.user,
                 )
-
-                response.raise_for_status()
-                api_response_data = response.json()
-
-                if api_response_data.get('message') == 'Course created successfully':
-                    course, created = ScormCloudCourse.objects.get_or_create(
-                        course_id=course_id, 
-                        defaults={
-                            'title': form.cleaned_data['title'],
-                            'version': api_response_data.get('version', ''),
-                            'web_path': api_response_data.get('web_path_to_course', '')  
-                        }
-                    )
-                    if not created:
-                        course.category = category
-                        course.duration = duration
-                        course.short_description = short_description
-                        course.long_description = long_description
-                        course.cover_image = cover_image
-                        course.save()
-
-                    logger.info(f"Course created/updated successfully: {course_id}, Response: {api_response_data}")
-
-                    # Register the administrator as a learner for this course
-                    try:
-                        admin_user = request.user
-                        learner = Learner.objects.get(user=admin_user)
-                        
-                        register_url = f'{domain}/api/register/'
-                        register_data = {
-                            'course_id': course_id,
-                            'learner_id': learner.id
-                        }
-                        
-                        register_response = requests.post(register_url, data=register_data)
-                        register_response.raise_for_status()
-                        
-                        logger.info(f"Administrator registered for course: {course_id}, Learner ID: {learner.id}")
-                    except Learner.DoesNotExist:
-                        logger.error(f"Learner object not found for administrator: {admin_user.username}")
-                    except requests.RequestException as e:
-                        logger.error(f"Error registering administrator for course: {e}")
-
-                    return redirect('course_list')
-
+                logger.info(f"Course import queued: {course_id}, Job ID: {job.id}")
+                if job.is_finished:
+                    messages.info(request, job.message)
                 else:
-                    error_msg = api_response_data.get('error', 'Unknown error')
-                    logger.error(f"Course creation API failed: {error_msg}")
-                    form.add_error(None, error_msg)
-
-            except requests.RequestException as e:
-                logger.exception("Error calling create_course API:")
-                form.add_error(None, f"Error creating course: {e}")
-            except ScormCloudCourse.DoesNotExist:
-                logger.error(f"Course with ID {course_id} not found after API call.")
-                form.add_error(None, "Course not found in database after creation.")
+                    messages.info(request, f"Course {course_id} is being imported. It will appear in the list once processing finishes.")
+                return redirect('course_list')
+
+            except ValueError as e:
+                logger.error(f"Course import could not be queued: {e}")
+                form.add_error(None, str(e))
     else:
         form = ScormCloudCourseForm()
     return render(request, 'administrator/upload_course.html', {
         'form': form, 
-        'generated_course_id': form.fields['course_id'].initial
+        # Shown for reference only; the id is reserved above when the upload is submitted
+        'generated_course_id': course_services.preview_course_id(),
         })
 
 
@@ -389,6 +351,47 @@ class CourseDeliveryCreateView(View):
             return render(request, 'errors/error_page.html', {'error': e})
         
 
+@login_required
+@require_POST
+def enroll_delivery_participants(request, delivery_id):
+    delivery = get_object_or_404(CourseDelivery, id=delivery_id)
+    job = delivery.enrollment_jobs.filter(status__in=['PENDING', 'RUNNING']).first()
+    if job:
+        messages.info(request, 'Participants of this delivery are already being registered.')
+    else:
+        job = BulkEnrollmentJob.objects.create(delivery=delivery, created_by=request.user)
+        logger.info(f"Queued enrollment job {job.pk} for delivery {delivery.delivery_code}")
+        messages.info(request, 'Participant registration has been queued.')
+    return redirect('course_delivery_detail', course_id=delivery.course_id, delivery_id=delivery.delivery_code)
+
+
+@login_required
+@require_POST
+def course_batch_import(request):
+    archive = request.FILES.get('archive')
+    if not archive or not archive.name.lower().endswith('.zip'):
+        messages.error(request, 'Upload a .zip archive containing the course packages.')
+        return redirect('course_list')
+
+    batch = CourseBatchImport.objects.create(
+        archive=archive,
+        course_fields={'category': request.POST.get('category', '')},
+        created_by=request.user,
+    )
+    logger.info(f"Queued batch import {batch.pk} from {archive.name}")
+    messages.info(request, f"Batch import {batch.pk} has been queued. Download its report once it finishes.")
+    return redirect('course_list')
+
+
+@login_required
+def course_batch_import_report(request, batch_id):
+    batch = get_object_or_404(CourseBatchImport, pk=batch_id)
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="course_batch_import_{batch.pk}.csv"'
+    write_report(batch.report, response)
+    return response
+
+
 def export_attendance(request, delivery_id):
     delivery = get_object_or_404(CourseDelivery, id=delivery_id)
     participants = Learner.objects.filter(enrolled_deliveries=delivery)
@@ -455,7 +458,7 @@ def preview_course(request, learner_id, course_id):
     try:
         learner = get_object_or_404(Learner, id=learner_id)
         course = get_object_or_404(ScormCloudCourse, id=course_id)
-        registration = get_object_or_404(ScormCloudRegistration, learner=learner, course_id=course.course_id)
+        registration = get_object_or_404(ScormCloudRegistration, learner=learner, course=course)
         return render(request, 'administrator/preview_course.html', { 
             'learner_id': learner_id,
             'registration_id': registration.registration_id,
@@ -4,14 +4,22 @@ from courses.models import CourseDelivery, ScormCloudCourse, ScormCloudRegistrat
 class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = ScormCloudCourse
-        fields = '__all__'  # Adjust the fields as necessary
+        # Only the columns courses.enrollment.enrolled_deliveries loads
+        fields = ['id', 'course_id', 'title', 'short_description', 'category', 'duration', 'cover_image']
 
 class CourseDeliverySerializer(serializers.ModelSerializer):
-    course = CourseSerializer(read_only=True)  # Assuming CourseDelivery has a 'course' ForeignKey to Course
+    course = CourseSerializer(read_only=True)
+    duration = serializers.CharField(read_only=True)
+    # Attached by courses.enrollment.enrolled_deliveries_page
+    registration_id = serializers.UUIDField(read_only=True, allow_null=True)
+    progress = serializers.DictField(read_only=True, allow_null=True)
 
     class Meta:
         model = CourseDelivery
-        fields = '__all__'  # Adjust the fields as necessary, ensure 'course' is included
+        fields = [
+            'id', 'title', 'delivery_code', 'delivery_type', 'enrollment_type', 'status', 'is_mandatory',
+            'timezone', 'starts_at', 'ends_at', 'deactivates_at', 'duration', 'course', 'registration_id', 'progress',
+        ]
 
 class ScormCloudRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -4,9 +4,19 @@ from . import views
 
 urlpatterns = [
     path('create_course/<str:course_id>/', views.create_course, name='create_course'),
+    path('course_uploads/', views.start_course_upload, name='start_course_upload'),
+    path('course_uploads/<uuid:upload_id>/', views.course_upload, name='course_upload'),
+    path('course_uploads/<uuid:upload_id>/complete/', views.complete_course_upload, name='complete_course_upload'),
+    path('import_jobs/<uuid:job_id>/', views.import_job_status, name='import_job_status'),
+    path('course_batch_imports/<int:batch_id>/', views.course_batch_import_status, name='course_batch_import_status'),
+    path('enrollment_jobs/<int:job_id>/', views.enrollment_job_status, name='enrollment_job_status'),
     path('register/', views.register_and_create_scorm_registration, name='register_and_create_scorm_registration'),
     path('scorm_cloud_operations/', views.scorm_cloud_operations, name='scorm_cloud_operations'),
+    path('scorm_cloud_postback/', views.scorm_cloud_postback, name='scorm_cloud_postback'),
+    path('scorm_cloud_pool_stats/', views.scorm_cloud_pool_stats, name='scorm_cloud_pool_stats'),
+    path('launch_link_cache_stats/', views.launch_link_cache_stats, name='launch_link_cache_stats'),
     path('delete_course/<str:course_id>/', views.DeleteCourseView.as_view(), name='delete_course'),
+    path('course_deletion_jobs/<int:job_id>/', views.course_deletion_job_status, name='course_deletion_job_status'),
 
 
     path('login/', views.LoginView.as_view(), name='api_login'),
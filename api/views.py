@@ -1,3 +1,5 @@
+import base64
+import hmac
 import logging
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -11,9 +13,11 @@ import os
 import json
 import zipfile
 import uuid
+from functools import wraps
 from django.views.decorators.http import require_POST, require_GET
 from django.http import JsonResponse, HttpResponseRedirect
 from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import user_passes_test
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -21,6 +25,7 @@ from rustici_software_cloud_v2.rest import ApiException
 from django.views import View
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 
 
 from rest_framework import status
@@ -30,15 +35,20 @@ from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken 
 
 from courses.models import ScormCloudCourse
-from .utils import course_id_is_valid
+from courses import app_config, clients, launch_links, services, uploads
+from courses.resilience import ScormCloudUnavailable
+from courses.enrollment import ENROLLED_PAGE_SIZE, enrolled_deliveries_page
 from accounts.models import Learner
-from courses.models import ScormCloudCourse, ScormCloudRegistration, CourseDelivery
+from courses.models import ScormCloudCourse, ScormCloudRegistration, CourseDelivery, CourseImportJob, CourseUpload, CourseBatchImport, CourseDeletionJob, BulkEnrollmentJob, RegistrationEvent
 
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .serializers import CourseDeliverySerializer, ScormCloudRegistrationSerializer  
 
@@ -46,100 +56,244 @@ User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
+def api_staff_required(view):
+    """
+    Guards the course job API. Callers must be staff, signed in with a session (CSRF still
+    enforced) or a JWT bearer token; others get a JSON 401, or 403 if they aren't staff.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        drf_request = Request(request)
+        for authenticator in (SessionAuthentication(), JWTAuthentication()):
+            try:
+                authenticated = authenticator.authenticate(drf_request)
+            except (AuthenticationFailed, PermissionDenied) as e:
+                return JsonResponse({'error': str(e.detail)}, status=401 if isinstance(e, AuthenticationFailed) else 403)
+            if authenticated is None:
+                continue
+            if not authenticated[0].is_staff:
+                return JsonResponse({'error': 'Staff access required'}, status=403)
+            request.user = authenticated[0]
+            return view(request, *args, **kwargs)
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    return wrapper
+
+
+def _import_queued_response(job):
+    return JsonResponse({
+        'message': job.message if job.is_finished else 'Course import queued',
+        'job_id': str(job.id),
+        'status': job.status,
+        'status_url': reverse('import_job_status', args=[job.id]),
+    }, status=202)
+
+
 @csrf_exempt
+@api_staff_required
 def create_course(request, course_id):
     if request.method == 'POST':
         logger.info("Received a POST request to create a course.")
 
-        # Course ID Validation
-        if not course_id_is_valid(course_id):
-            return JsonResponse({'error': 'Invalid course ID format'}, status=400)
-        
-        course_file = request.FILES.get('file')
-        if not course_file:
-            logger.error("No course file provided.")
-            return JsonResponse({'error': 'Course file is required'}, status=400)
-        # if not zipfile.is_zipfile(course_file):
-        #     return JsonResponse({'error': 'Invalid file type. Please upload a SCORM ZIP archive.'}, status=400)
-        
-        # Check for Existing Course
         try:
-            ScormCloudCourse.objects.get(course_id=course_id)  # Query the database
-            return JsonResponse({'error': 'A course with this ID already exists.'}, status=400)
-        except ScormCloudCourse.DoesNotExist:
-            pass  # Course doesn't exist, proceed with creation
+            # Store the package and leave the upload/polling to the course job worker
+            job = services.queue_course_import(
+                course_id,
+                request.FILES.get('file'),
+                course_fields=request.POST.dict(),
+                cover_image=request.FILES.get('cover_image'),
+                published_by=request.user,
+            )
+        except ValueError as e:
+            logger.error(str(e))
+            return JsonResponse({'error': str(e)}, status=400)
 
-        # Save the uploaded file to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            shutil.copyfileobj(course_file.file, temp_file)
-            temp_file_path = temp_file.name
+        return _import_queued_response(job)
+    else:
+        logger.warning("Received a non-POST request.")
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
 
-        logger.info("Configuring ScormCloud API.")
-        # Configure ScormCloud API
-        config = scorm_cloud.Configuration()
-        config.username = settings.CLOUDSCORM_APP_ID
-        config.password = settings.CLOUDSCORM_SECRET_KEY
-        scorm_cloud.Configuration().set_default(config)
 
-        course_api = scorm_cloud.CourseApi()
+@csrf_exempt
+@require_POST
+@api_staff_required
+def start_course_upload(request):
+    try:
+        size = int(request.POST.get('size', ''))
+        upload = uploads.start_upload(
+            request.POST.get('filename'),
+            size,
+            sha256=request.POST.get('sha256', ''),
+            created_by=request.user,
+        )
+    except ValueError as e:
+        logger.error(f"Could not start course upload: {e}")
+        return JsonResponse({'error': str(e)}, status=400)
 
-        try:
-            logger.info("Creating and importing the course.")
-            # Create and import the course using the path of the temporary file
-            job_id = course_api.create_upload_and_import_course_job(course_id, file=temp_file_path)
-
-            logger.info(f"Checking job status for job ID: {job_id.result}.")
-            # Check job status
-            job_result = course_api.get_import_job_status(job_id.result)
-            while job_result.status == "RUNNING":
-                logger.info("Job is running; waiting for completion.")
-                time.sleep(1)
-                job_result = course_api.get_import_job_status(job_id.result)
-
-            # Print the raw output from the job_result
-            logger.info(f"Raw job result: {job_result}")
-
-            if job_result.status == "ERROR":
-                logger.error(f"Course import failed: {job_result.message}")
-                return JsonResponse({'error': f"Course import failed: {job_result.message}"}, status=400)
-
-            logger.info("Course created successfully.")
-
-            # Extract course details from job_result
-            course_data = job_result.import_result.course
-            course_id = course_data.id
-            title = course_data.title
-            version = course_data.version
-            created_at = course_data.created
-            updated_at = course_data.updated
-            web_path = job_result.import_result.web_path_to_course
-
-            # Save the course details to the database
-            scorm_course = ScormCloudCourse(
-                course_id=course_id,
-                title=title,
-                version=version,
-                created_at=created_at,
-                updated_at=updated_at,
-                web_path=web_path
-            )
-            scorm_course.save()
+    return JsonResponse({
+        'upload_id': str(upload.id),
+        'offset': upload.received,
+        'size': upload.size,
+        'upload_url': reverse('course_upload', args=[upload.id]),
+        'complete_url': reverse('complete_course_upload', args=[upload.id]),
+    }, status=201)
 
-            job_result_dict = job_result.to_dict() if hasattr(job_result, 'to_dict') else {}
 
-            return JsonResponse({'message': 'Course created successfully', 'job_result': job_result_dict})
+@csrf_exempt
+@require_http_methods(["GET", "PUT"])
+@api_staff_required
+def course_upload(request, upload_id):
+    """
+    GET reports how many bytes were received so a client can resume. PUT writes the raw
+    request body at the byte offset given in the Upload-Offset header.
+    """
+    if request.method == 'GET':
+        upload = get_object_or_404(CourseUpload, pk=upload_id, created_by=request.user)
+        return JsonResponse({'upload_id': str(upload.id), 'offset': upload.received, 'size': upload.size, 'status': upload.status})
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if not length:
+            raise ValueError('Chunk body is empty')
+        upload = uploads.write_chunk(upload_id, offset, request, length, created_by=request.user)
+    except CourseUpload.DoesNotExist:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    except uploads.OffsetMismatch as e:
+        return JsonResponse({'error': str(e), 'offset': e.received}, status=409)
+    except ValueError as e:
+        logger.error(f"Rejected chunk for upload {upload_id}: {e}")
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'upload_id': str(upload.id), 'offset': upload.received, 'size': upload.size})
 
-        except scorm_cloud.rest.ApiException as e:
-            logger.exception("An error occurred with the ScormCloud API.")
-            return JsonResponse({'error': str(e)}, status=500)
-        except Exception as e:
-            logger.exception("An unexpected error occurred.")
-            return JsonResponse({'error': 'An unexpected error occurred'}, status=500)
-        finally:
-            os.remove(temp_file_path)
-    else:
-        logger.warning("Received a non-POST request.")
-        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+
+@csrf_exempt
+@require_POST
+@api_staff_required
+def complete_course_upload(request, upload_id):
+    try:
+        job = uploads.complete_upload(
+            upload_id,
+            request.POST.get('course_id', ''),
+            published_by=request.user,
+            sha256=request.POST.get('sha256', ''),
+            course_fields=request.POST.dict(),
+            cover_image=request.FILES.get('cover_image'),
+        )
+    except CourseUpload.DoesNotExist:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    except ValueError as e:
+        logger.error(f"Could not complete upload {upload_id}: {e}")
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return _import_queued_response(job)
+
+
+@require_GET
+@api_staff_required
+def import_job_status(request, job_id):
+    job = get_object_or_404(CourseImportJob, pk=job_id)
+    return JsonResponse({
+        'job_id': str(job.id),
+        'course_id': job.course_id,
+        'status': job.status,
+        'message': job.message,
+        'course': ScormCloudCourse.objects.filter(course_id=job.course_id).values_list('pk', flat=True).first() if job.status == 'COMPLETE' else None,
+        'created_at': job.created_at,
+        'updated_at': job.updated_at,
+    }, encoder=DjangoJSONEncoder)
+
+def _postback_authorized(request):
+    username = settings.CLOUDSCORM_POSTBACK_USERNAME
+    password = settings.CLOUDSCORM_POSTBACK_PASSWORD
+    if not username or not password:
+        return False
+
+    auth_type, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if auth_type.lower() != 'basic':
+        return False
+    try:
+        given_username, _, given_password = base64.b64decode(credentials).decode().partition(':')
+    except (ValueError, UnicodeDecodeError):
+        return False
+    return hmac.compare_digest(given_username, username) and hmac.compare_digest(given_password, password)
+
+
+@csrf_exempt
+@require_POST
+def scorm_cloud_postback(request):
+    """
+    Receives ScormCloud registration postbacks. The payload is only queued here; the
+    course job worker applies it, so bursts never hold up web workers.
+    """
+    if not _postback_authorized(request):
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+
+    try:
+        payload = json.loads(request.body)
+        registration = payload.get('registration', payload)
+        registration_id = uuid.UUID(registration['id'])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        logger.error("Received a malformed ScormCloud postback.")
+        return JsonResponse({'error': 'Invalid postback payload'}, status=400)
+
+    RegistrationEvent.objects.create(registration_id=registration_id, payload=registration)
+    return JsonResponse({'message': 'Accepted'})
+
+
+@require_GET
+@api_staff_required
+def enrollment_job_status(request, job_id):
+    job = get_object_or_404(BulkEnrollmentJob, pk=job_id)
+    return JsonResponse({
+        'job_id': job.pk,
+        'delivery_code': job.delivery.delivery_code,
+        'status': job.status,
+        'total': job.total,
+        'registered': job.registered,
+        'failed': job.failed,
+        'message': job.message,
+        'updated_at': job.updated_at,
+    }, encoder=DjangoJSONEncoder)
+
+@require_GET
+@api_staff_required
+def course_batch_import_status(request, batch_id):
+    batch = get_object_or_404(CourseBatchImport, pk=batch_id)
+    return JsonResponse({
+        'batch_id': batch.pk,
+        'status': batch.status,
+        'total': batch.total,
+        'processed': batch.processed,
+        'message': batch.message,
+        'report': batch.report,
+        'updated_at': batch.updated_at,
+    }, encoder=DjangoJSONEncoder)
+
+@require_GET
+@api_staff_required
+def course_deletion_job_status(request, job_id):
+    job = get_object_or_404(CourseDeletionJob, pk=job_id)
+    return JsonResponse({
+        'job_id': job.pk,
+        'course_id': job.course_id,
+        'status': job.status,
+        'remote_deleted': job.remote_deleted,
+        'registrations_deleted': job.registrations_deleted,
+        'deliveries_deleted': job.deliveries_deleted,
+        'message': job.message,
+        'updated_at': job.updated_at,
+    }, encoder=DjangoJSONEncoder)
+
+@require_GET
+@user_passes_test(lambda user: user.is_staff)
+def scorm_cloud_pool_stats(request):
+    return JsonResponse({'pools': clients.pool_stats(), **clients.resilience_stats()})
+
+@require_GET
+@user_passes_test(lambda user: user.is_staff)
+def launch_link_cache_stats(request):
+    return JsonResponse(launch_links.launch_link_cache.stats())
 
 @csrf_exempt
 @require_POST
@@ -155,57 +309,8 @@ def register_and_create_scorm_registration(request):
         learner = Learner.objects.get(pk=learner_id)
         course = ScormCloudCourse.objects.get(course_id=course_id)
 
-        # 2. Check if Already Registered:
-        existing_registration = ScormCloudRegistration.objects.filter(
-            learner=learner, course_id=course_id
-        ).exists()
-        if existing_registration:
-            return JsonResponse({'error': 'Learner is already registered for this course.'}, status=400)
-
-        # 3. ScormCloud Registration:
-        config = scorm_cloud.Configuration()
-        config.username = settings.CLOUDSCORM_APP_ID
-        config.password = settings.CLOUDSCORM_SECRET_KEY
-        scorm_cloud.Configuration().set_default(config)
-        registration_api = scorm_cloud.RegistrationApi()
-
-        registration_id = str(uuid.uuid4())
-
-        scorm_learner = scorm_cloud.LearnerSchema(
-            id=str(learner.user.id),
-            first_name=learner.user.first_name,
-            last_name=learner.user.last_name
-        )
-
-        registration = scorm_cloud.CreateRegistrationSchema(
-            course_id=course_id,
-            learner=scorm_learner, 
-            registration_id=registration_id,
-        )
-    
-        # Create the registration on ScormCloud
-        registration_api.create_registration(registration)
-        logger.info(f"Registration for learner {learner_id} and course {course_id} sent to ScormCloud.")
-
-        try:
-            # Attempt to fetch the created registration
-            created_registration = registration_api.get_registration_progress(registration_id)
-
-            # 4. Handle ScormCloud Response:
-            if created_registration is None or created_registration.id is None:
-                raise Exception("ScormCloud registration failed: Unable to retrieve created registration.")
-
-        except scorm_cloud.rest.ApiException as api_e:
-            logger.error(f"ScormCloud API Error: {api_e}")
-            return JsonResponse({'error': f'ScormCloud registration failed: {api_e.reason}'}, status=500)
-
-        # 5. Save Registration in Your Database:
-        registration = ScormCloudRegistration(
-            registration_id=created_registration.id,
-            learner=learner,
-            course_id=course_id
-        )
-        registration.save()
+        # 2. Save locally; the course job worker relays the registration to ScormCloud:
+        registration = services.register_learner(learner, course_id)
 
         return JsonResponse({
             'message': 'Registration successful',
@@ -234,12 +339,6 @@ def register_and_create_scorm_registration(request):
 @require_http_methods(["GET", "POST"])
 def scorm_cloud_operations(request):
     try:
-        # ScormCloud Configuration
-        config = scorm_cloud.Configuration()
-        config.username = settings.CLOUDSCORM_APP_ID
-        config.password = settings.CLOUDSCORM_SECRET_KEY
-        scorm_cloud.Configuration().set_default(config)
-
         if request.method == 'GET':
             return get_launch_link(request)
         elif request.method == 'POST':
@@ -261,25 +360,24 @@ def get_launch_link(request):
         learner = Learner.objects.get(pk=learner_id)
         registration = ScormCloudRegistration.objects.get(registration_id=registration_id, learner=learner)
 
-        registration_api = scorm_cloud.RegistrationApi()
-
-        # Build Launch Link
-        launch_link_request = {
-            "redirectOnExitUrl": "https://your-lms.com/exit",  # Replace with your actual exit URL
-            "launchAuth": {
-                "type": "vault"
-            },
-            "expiry": 3600, 
-            "tracking": True
-        }
-        
-        launch_link_response = registration_api.build_registration_launch_link(
-            registration_id=str(registration.registration_id), 
-            launch_link_request=launch_link_request,
-        )
-        
-        return JsonResponse({'launch_link': launch_link_response.launch_link})
+        # Memoized per process; only reaches ScormCloud when the desired settings changed
+        try:
+            app_config.apply_application_configuration()
+        except scorm_cloud.rest.ApiException as api_e:
+            logger.error(f"ScormCloud API Error while applying application configuration: {api_e}")
 
+        launch_link = launch_links.get_launch_link(registration.registration_id, learner.pk)
+        
+        return JsonResponse({'launch_link': launch_link})
+
+    except launch_links.RegistrationPending as e:
+        logger.warning(str(e))
+        response = JsonResponse({'error': 'Your registration for this course is still being set up, please try again shortly.', 'status': 'registration_pending'}, status=503)
+        response['Retry-After'] = '5'
+        return response
+    except ScormCloudUnavailable as e:
+        logger.warning(f"ScormCloud unavailable for launch link: {e.reason}")
+        return JsonResponse({'error': 'ScormCloud is temporarily unavailable, please try again shortly.'}, status=503)
     except (Learner.DoesNotExist, ScormCloudRegistration.DoesNotExist) as e:
         logger.error(f"Resource not found: {str(e)}")
         return JsonResponse({'error': str(e)}, status=404)
@@ -292,30 +390,9 @@ def get_launch_link(request):
 
 def set_application_configuration(request):
     try:
-        app_management_api = scorm_cloud.ApplicationManagementApi()
-
-        config_settings = {
-            "settings": [
-                {
-                    "settingId": "PlayerLaunchType",
-                    "value": "FRAMESET",
-                    "explicit": True
-                },
-                {
-                    "settingId": "PlayerScoLaunchType",
-                    "value": "FRAMESET",
-                    "explicit": True
-                },
-                {
-                    "settingId": "LaunchAuthType",
-                    "value": "vault",
-                    "explicit": True
-                }
-            ]
-        }
-
-        response = app_management_api.set_application_configuration(config_settings)
-        return JsonResponse({'message': 'Application configuration updated successfully'})
+        if app_config.apply_application_configuration(force=request.GET.get('force') == '1'):
+            return JsonResponse({'message': 'Application configuration updated successfully'})
+        return JsonResponse({'message': 'Application configuration is already up to date'})
 
     except scorm_cloud.rest.ApiException as api_e:
         logger.error(f"ScormCloud API Error: {api_e}")
@@ -323,38 +400,28 @@ def set_application_configuration(request):
     
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(api_staff_required, name='delete')
 class DeleteCourseView(View):
     def delete(self, request, course_id):
         try:
-            # Configure SCORM Cloud client
-            config = scorm_cloud.Configuration()
-            config.username = settings.CLOUDSCORM_APP_ID
-            config.password = settings.CLOUDSCORM_SECRET_KEY
-            scorm_cloud.Configuration().set_default(config)
-            
-            # Initialize CourseApi
-            course_api = scorm_cloud.CourseApi()
-            
-            # Delete the course
-            course_api.delete_course(course_id)
-            
-            # Delete the course from local database
-            try:
-                scorm_course = ScormCloudCourse.objects.get(course_id=course_id)
-                scorm_course.delete()
-                logger.info(f"Course with ID {course_id} has been successfully deleted from SCORM Cloud and local database.")
-            except ObjectDoesNotExist:
-                logger.warning(f"Course with ID {course_id} was deleted from SCORM Cloud but not found in local database.")
-            
-            return JsonResponse({"message": "Course deleted successfully from SCORM Cloud and local database"}, status=200)
-        
+            job = services.delete_course(course_id, requested_by=request.user)
+
+            return JsonResponse({
+                "message": "Course deleted; its registrations and deliveries are being removed in the background",
+                "job_id": job.pk,
+                "status_url": reverse('course_deletion_job_status', args=[job.pk]),
+            }, status=202)
+
+        except ScormCloudCourse.DoesNotExist:
+            return JsonResponse({"error": "Course not found"}, status=404)
+
         except ApiException as e:
             logger.error(f"API error occurred while deleting course {course_id} from SCORM Cloud: {str(e)}")
             return JsonResponse({"error": "API error occurred", "details": str(e)}, status=500)
         
         except ValueError as e:
             logger.error(f"Value error occurred while deleting course {course_id}: {str(e)}")
-            return JsonResponse({"error": "Invalid course ID", "details": str(e)}, status=400)
+            return JsonResponse({"error": str(e)}, status=400)
         
         except Exception as e:
             logger.error(f"Unexpected error occurred while deleting course {course_id}: {str(e)}")
@@ -412,10 +479,18 @@ class EnrolledCoursesView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        learner = request.user.learner
-        enrolled_deliveries = CourseDelivery.objects.filter(participants=learner)
-        serializer = CourseDeliverySerializer(enrolled_deliveries, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            page_size = int(request.query_params.get('page_size', ENROLLED_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "page_size must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        page = enrolled_deliveries_page(request.user.learner, request.query_params.get('page', 1), page_size)
+        serializer = CourseDeliverySerializer(page.object_list, many=True)
+        return Response({
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'results': serializer.data,
+        }, status=status.HTTP_200_OK)
     
     
 class GetRegistrationIDView(APIView):
@@ -430,7 +505,7 @@ class GetRegistrationIDView(APIView):
             return Response({"error": "learner_id and course_id must be provided."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Assuming 'Learner' model has an 'id' field that matches 'learner_id'
-        registration = get_object_or_404(ScormCloudRegistration, learner__id=learner_id, course_id=course_id)
+        registration = get_object_or_404(ScormCloudRegistration, learner_id=learner_id, course_id=course_id)
         serializer = ScormCloudRegistrationSerializer(registration)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
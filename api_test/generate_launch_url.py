@@ -1,14 +1,19 @@
+import os
+
 import rustici_software_cloud_v2 as scorm_cloud
 
-# ScormCloud API credentials
-APP_ID = "ZSBCOYAWTG"
-SECRET_KEY = "sR0YOQOBhIsk155gftenvkzLAOdnq4tokbASNZtt"
+# ScormCloud API credentials; set CLOUDSCORM_HOST to run against `manage.py run_fake_scorm_cloud`
+APP_ID = os.getenv("CLOUDSCORM_APP_ID")
+SECRET_KEY = os.getenv("CLOUDSCORM_SECRET_KEY")
+HOST = os.getenv("CLOUDSCORM_HOST")
 
 def build_launch_link(registration_id):
     # Configure HTTP basic authorization
     config = scorm_cloud.Configuration()
     config.username = APP_ID
     config.password = SECRET_KEY
+    if HOST:
+        config.host = HOST
     scorm_cloud.Configuration().set_default(config)
 
     # Initialize RegistrationApi
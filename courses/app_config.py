@@ -0,0 +1,63 @@
+import hashlib
+import json
+import logging
+import threading
+
+from . import clients
+from .models import ScormCloudAppConfiguration
+
+logger = logging.getLogger(__name__)
+
+# Player settings every ScormCloud application used by the LMS must have
+APPLICATION_SETTINGS = {
+    "settings": [
+        {
+            "settingId": "PlayerLaunchType",
+            "value": "FRAMESET",
+            "explicit": True
+        },
+        {
+            "settingId": "PlayerScoLaunchType",
+            "value": "FRAMESET",
+            "explicit": True
+        },
+        {
+            "settingId": "LaunchAuthType",
+            "value": "vault",
+            "explicit": True
+        }
+    ]
+}
+
+# App ids whose configuration this process has already confirmed to be current
+_reconciled = set()
+_lock = threading.Lock()
+
+
+def settings_hash(config_settings=APPLICATION_SETTINGS):
+    return hashlib.sha256(json.dumps(config_settings, sort_keys=True).encode()).hexdigest()
+
+
+def apply_application_configuration(tenant=None, force=False):
+    """
+    Pushes APPLICATION_SETTINGS to ScormCloud unless the stored hash shows they are already applied.
+
+    Returns True if a push happened. Results are memoized per process, so calling this on
+    every launch costs nothing after the first check.
+    """
+    app_id, _ = clients.get_credentials(tenant)
+    if not force and app_id in _reconciled:
+        return False
+
+    with _lock:
+        desired_hash = settings_hash()
+        applied = ScormCloudAppConfiguration.objects.filter(app_id=app_id).first()
+        if not force and applied and applied.settings_hash == desired_hash:
+            _reconciled.add(app_id)
+            return False
+
+        clients.application_api(tenant).set_application_configuration(APPLICATION_SETTINGS)
+        ScormCloudAppConfiguration.objects.update_or_create(app_id=app_id, defaults={'settings_hash': desired_hash})
+        _reconciled.add(app_id)
+        logger.info(f"Applied ScormCloud application configuration {desired_hash[:12]} to {app_id}.")
+        return True
@@ -0,0 +1,253 @@
+import csv
+import logging
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.files import File
+from django.db import DatabaseError
+from django.utils.dateparse import parse_duration
+
+from accounts.models import Learner
+from . import clients, resilience
+from .models import ScormCloudCourse, ScormCloudRegistration
+from .packages import inspect_package, package_digest
+from .services import COURSE_IMPORT_FIELDS, allocate_course_ids, create_remote_registration, registration_id_for
+
+logger = logging.getLogger(__name__)
+
+# Packages imported concurrently; two slots of the per-process ScormCloud import bulkhead stay
+# free so admin uploads made during a batch aren't rejected
+BATCH_IMPORT_WORKERS = resilience.BULKHEAD_LIMITS['import'] - 2
+# Finished imports are written with one bulk_create per this many courses
+COURSE_SAVE_BATCH_SIZE = 50
+# ScormCloud import status polling backs off between these bounds, and gives up after IMPORT_TIMEOUT (seconds)
+IMPORT_POLL_MIN = 1
+IMPORT_POLL_MAX = 15
+IMPORT_TIMEOUT = 30 * 60
+# Bytes copied per read when extracting packages from an outer archive
+EXTRACT_READ_SIZE = 1024 * 1024
+
+REPORT_FIELDS = [
+    'package', 'course_id', 'status', 'message',
+    'package_type', 'package_resource_count', 'package_file_count', 'package_size',
+]
+
+
+def collect_packages(source, workdir):
+    """
+    Returns (name, path) for every .zip package in ``source``, a directory or an outer zip.
+
+    Packages inside an archive are streamed out to ``workdir`` one at a time, so the archive
+    is never held in memory.
+    """
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.lower().endswith('.zip'))
+        return [(name, os.path.join(source, name)) for name in names]
+
+    try:
+        archive = zipfile.ZipFile(source)
+    except (zipfile.BadZipFile, FileNotFoundError, IsADirectoryError):
+        raise ValueError(f"{source} is neither a directory nor a zip archive of course packages")
+
+    packages = []
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith('.zip'):
+                continue
+            path = os.path.join(workdir, f"{len(packages):05d}-{os.path.basename(info.filename)}")
+            with archive.open(info) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, EXTRACT_READ_SIZE)
+            packages.append((info.filename, path))
+    return packages
+
+
+def _import_package(course_id, path, learner):
+    """Uploads one package, waits for ScormCloud to finish importing it and registers ``learner``."""
+    course_api = clients.course_api()
+    response = course_api.create_upload_and_import_course_job(course_id, file=path)
+    deadline = time.monotonic() + IMPORT_TIMEOUT
+    delay = IMPORT_POLL_MIN
+    while True:
+        time.sleep(delay)
+        result = course_api.get_import_job_status(response.result)
+        if result.status != 'RUNNING':
+            break
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"ScormCloud import {response.result} still running after {IMPORT_TIMEOUT}s")
+        delay = min(delay * 2, IMPORT_POLL_MAX)
+    if result.status == 'ERROR':
+        raise ValueError(f"Course import failed: {result.message}")
+
+    registration_id = None
+    if learner is not None:
+        registration_id = registration_id_for(learner, course_id)
+        try:
+            create_remote_registration(clients.registration_api(), learner, course_id, registration_id)
+        except Exception as e:
+            logger.error(f"Could not register publisher for batch-imported course {course_id}: {e}")
+            registration_id = None
+    return result, registration_id
+
+
+def _save(imported):
+    """
+    Saves finished imports, given as (report row, course, registration or None).
+
+    A course id can be taken while the batch runs (an admin upload claiming an id the
+    allocation had handed out), so conflicts are skipped rather than aborting the batch,
+    and rows whose course didn't land are reported as failed.
+    """
+    if not imported:
+        return
+    try:
+        ScormCloudCourse.objects.bulk_create([course for _, course, _ in imported], ignore_conflicts=True)
+        saved = set(
+            ScormCloudCourse.all_objects.filter(
+                course_id__in=[course.course_id for _, course, _ in imported],
+            ).values_list('course_id', 'package_sha256')
+        )
+    except DatabaseError as e:
+        logger.error(f"Could not save {len(imported)} batch-imported courses: {e}")
+        saved, reason = set(), f"Could not save the course: {e}"
+    else:
+        reason = 'Course id was taken by another course during the import; the package was not saved'
+
+    registrations = []
+    for row, course, registration in imported:
+        if (course.course_id, course.package_sha256) not in saved:
+            logger.error(f"Batch-imported {row['package']} was not saved as {course.course_id}: {reason}")
+            row.update(status='failed', message=reason)
+        elif registration is not None:
+            registrations.append(registration)
+    try:
+        ScormCloudRegistration.objects.bulk_create(registrations, ignore_conflicts=True)
+    except DatabaseError as e:
+        logger.error(f"Could not save publisher registrations for batch-imported courses: {e}")
+    imported.clear()
+
+
+def import_packages(packages, published_by=None, course_fields=None, max_workers=BATCH_IMPORT_WORKERS, progress=None):
+    """
+    Imports many course packages and returns one report row per package.
+
+    Every package is validated and hashed first. Content already on a course, or repeated
+    within the batch, is linked instead of imported, and the remaining packages get their
+    course ids in one allocation. Imports then run ``max_workers`` at a time, and finished
+    courses are saved with bulk_create. ``progress`` is called as ``progress(done, total)``.
+    """
+    course_fields = {
+        field: value for field, value in (course_fields or {}).items()
+        if field in COURSE_IMPORT_FIELDS and value
+    }
+    if course_fields.get('duration'):
+        course_fields['duration'] = parse_duration(course_fields['duration'])
+    # Loaded with its user, since the pool threads read learner.user for every registration
+    learner = Learner.objects.select_related('user').filter(user=published_by).first() if published_by else None
+
+    report = []
+    candidates = []
+    for name, path in packages:
+        row = {'package': name, 'course_id': None, 'status': None, 'message': ''}
+        report.append(row)
+        try:
+            with open(path, 'rb') as f:
+                row.update(inspect_package(f))
+                digest = package_digest(File(f))
+        except ValueError as e:
+            row.update(status='invalid', message=str(e))
+            continue
+        candidates.append((row, path, digest))
+
+    existing = dict(
+        ScormCloudCourse.objects.filter(package_sha256__in=[digest for _, _, digest in candidates])
+        .values_list('package_sha256', 'course_id')
+    )
+    first_in_batch = {}
+    to_import = []
+    for row, path, digest in candidates:
+        if digest in existing:
+            row.update(course_id=existing[digest], status='linked', message=f"Identical to course {existing[digest]}")
+        elif digest in first_in_batch:
+            row.update(status='linked', message=f"Identical to {first_in_batch[digest]['package']} in this batch")
+            row['duplicate_of'] = first_in_batch[digest]
+        else:
+            first_in_batch[digest] = row
+            to_import.append((row, path, digest))
+
+    for (row, _, _), course_id in zip(to_import, allocate_course_ids(len(to_import))):
+        row['course_id'] = course_id
+
+    total = len(report)
+    done = total - len(to_import)
+    if progress:
+        progress(done, total)
+
+    imported = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, BATCH_IMPORT_WORKERS)) as executor:
+        futures = {
+            executor.submit(_import_package, row['course_id'], path, learner): (row, digest)
+            for row, path, digest in to_import
+        }
+        for future in as_completed(futures):
+            row, digest = futures[future]
+            done += 1
+            try:
+                result, registration_id = future.result()
+            except Exception as e:
+                logger.error(f"Batch import of {row['package']} as {row['course_id']} failed: {e}")
+                row.update(status='failed', message=str(getattr(e, 'reason', None) or e))
+            else:
+                course = result.import_result.course
+                saved_course = ScormCloudCourse(
+                    course_id=row['course_id'],
+                    title=course.title,
+                    version=course.version,
+                    created_at=course.created,
+                    updated_at=course.updated,
+                    web_path=result.import_result.web_path_to_course,
+                    published_by=published_by,
+                    package_sha256=digest,
+                    package_type=row['package_type'],
+                    package_resource_count=row['package_resource_count'],
+                    package_file_count=row['package_file_count'],
+                    package_size=row['package_size'],
+                    **course_fields,
+                )
+                registration = None
+                if registration_id:
+                    registration = ScormCloudRegistration(registration_id=registration_id, learner=learner, course_id=row['course_id'])
+                imported.append((row, saved_course, registration))
+                row['status'] = 'imported'
+                if len(imported) >= COURSE_SAVE_BATCH_SIZE:
+                    _save(imported)
+            if progress:
+                progress(done, total)
+    _save(imported)
+
+    for row in report:
+        original = row.pop('duplicate_of', None)
+        if original is None:
+            continue
+        row['course_id'] = original['course_id']
+        if original['status'] != 'imported':
+            row.update(course_id=None, status='failed', message=f"Identical to {original['package']}, which was not imported")
+
+    logger.info(f"Batch import finished: {summarize(report)}")
+    return report
+
+
+def summarize(report):
+    counts = {'imported': 0, 'linked': 0, 'invalid': 0, 'failed': 0}
+    for row in report:
+        counts[row['status']] += 1
+    return counts
+
+
+def write_report(report, f):
+    """Writes the per-package report as CSV to the open text file ``f``."""
+    writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(report)
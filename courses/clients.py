@@ -0,0 +1,97 @@
+import threading
+
+from django.conf import settings
+import rustici_software_cloud_v2 as scorm_cloud
+
+from . import resilience
+
+# One pooled ApiClient per ScormCloud credential set, shared by every thread in the process.
+# The underlying urllib3 PoolManager is thread-safe and keeps connections alive between
+# requests, so callers reuse TLS sessions instead of reconnecting per request.
+_clients = {}
+# One circuit breaker per ScormCloud app, keyed by app id
+_breakers = {}
+_lock = threading.Lock()
+
+
+def get_credentials(tenant=None):
+    """Returns the (app_id, secret_key) pair for ``tenant``, falling back to the project settings."""
+    if tenant is not None and tenant.cloudscorm_app_id and tenant.cloudscorm_secret_key:
+        return tenant.cloudscorm_app_id, tenant.cloudscorm_secret_key
+    return settings.CLOUDSCORM_APP_ID, settings.CLOUDSCORM_SECRET_KEY
+
+
+def tenants_with_credentials():
+    """Tenants that bring their own ScormCloud app rather than using the project credentials."""
+    from multitenancy.models import TenantRequest
+
+    return (
+        TenantRequest.objects.exclude(cloudscorm_app_id__isnull=True).exclude(cloudscorm_app_id='')
+        .exclude(cloudscorm_secret_key__isnull=True).exclude(cloudscorm_secret_key='')
+    )
+
+
+def get_api_client(tenant=None):
+    app_id, secret_key = get_credentials(tenant)
+    key = (app_id, secret_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                config = scorm_cloud.Configuration()
+                config.username = app_id
+                config.password = secret_key
+                if settings.CLOUDSCORM_HOST:
+                    config.host = settings.CLOUDSCORM_HOST
+                config.connection_pool_maxsize = settings.CLOUDSCORM_POOL_MAXSIZE
+                client = scorm_cloud.ApiClient(config)
+                # Retries are decided by the resilience layer, not silently repeated by urllib3
+                client.rest_client.pool_manager.connection_pool_kw['retries'] = False
+                _clients[key] = client
+    return client
+
+
+def get_breaker(tenant=None):
+    app_id, _ = get_credentials(tenant)
+    with _lock:
+        breaker = _breakers.get(app_id)
+        if breaker is None:
+            breaker = _breakers[app_id] = resilience.CircuitBreaker(app_id)
+    return breaker
+
+
+def course_api(tenant=None):
+    return resilience.ResilientApi(scorm_cloud.CourseApi(get_api_client(tenant)), get_breaker(tenant))
+
+
+def registration_api(tenant=None):
+    return resilience.ResilientApi(scorm_cloud.RegistrationApi(get_api_client(tenant)), get_breaker(tenant))
+
+
+def application_api(tenant=None):
+    return resilience.ResilientApi(scorm_cloud.ApplicationManagementApi(get_api_client(tenant)), get_breaker(tenant))
+
+
+def pool_stats():
+    """Connection pool metrics for every registered client, keyed by ScormCloud app id."""
+    stats = {}
+    for (app_id, _), client in list(_clients.items()):
+        pool_manager = client.rest_client.pool_manager
+        pools = [pool_manager.pools[key] for key in pool_manager.pools.keys()]
+        stats[app_id] = {
+            'maxsize': client.configuration.connection_pool_maxsize,
+            'pools': len(pools),
+            'connections_opened': sum(pool.num_connections for pool in pools),
+            'requests': sum(pool.num_requests for pool in pools),
+            'idle_connections': sum(pool.pool.qsize() for pool in pools if pool.pool is not None),
+        }
+    return stats
+
+
+def resilience_stats():
+    """Circuit breaker state per ScormCloud app id and bulkhead usage per operation class."""
+    return {
+        'circuits': {app_id: breaker.stats() for app_id, breaker in list(_breakers.items())},
+        'bulkheads': resilience.stats(),
+    }
@@ -0,0 +1,126 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from accounts.models import Learner
+from . import clients
+from .models import CourseDelivery, ScormCloudRegistration
+from .progress import learner_progress
+from .services import create_remote_registration, registration_id_for
+
+logger = logging.getLogger(__name__)
+
+ENROLLMENT_BATCH_SIZE = 100
+# Enrolled deliveries shown to a learner per page, and the most a client may ask for
+ENROLLED_PAGE_SIZE = 24
+ENROLLED_MAX_PAGE_SIZE = 100
+# Columns loaded for enrolled-delivery listings; everything the learner page and API show
+ENROLLED_DELIVERY_FIELDS = [
+    'id', 'title', 'delivery_code', 'delivery_type', 'enrollment_type', 'status', 'is_mandatory',
+    'timezone', 'starts_at', 'ends_at', 'deactivates_at', 'duration_seconds', 'duration_months',
+    'course__id', 'course__course_id', 'course__title', 'course__short_description',
+    'course__category', 'course__duration', 'course__cover_image',
+]
+
+
+def unregistered_participants(delivery):
+    """Participants of ``delivery`` that have no ScormCloudRegistration for its course yet."""
+    registered = ScormCloudRegistration.objects.filter(course_id=delivery.course.course_id).values('learner_id')
+    return (
+        Learner.objects.filter(enrolled_deliveries=delivery)
+        .exclude(pk__in=registered)
+        .select_related('user')
+        .order_by('pk')
+    )
+
+
+def enrolled_deliveries(learner):
+    """
+    Deliveries ``learner`` is enrolled in, deactivated ones included, ordered by start, with
+    their course joined and only ENROLLED_DELIVERY_FIELDS loaded.
+    """
+    return (
+        CourseDelivery.objects.filter(participants=learner, course__deleted_at__isnull=True)
+        .select_related('course')
+        .only(*ENROLLED_DELIVERY_FIELDS)
+        .order_by('starts_at', 'pk')
+    )
+
+
+def enrolled_deliveries_page(learner, page=1, page_size=ENROLLED_PAGE_SIZE):
+    """
+    Returns one Paginator page of ``learner``'s enrolled deliveries.
+
+    Each delivery carries ``registration_id`` and ``progress`` (a dict of RegistrationProgress
+    fields, or None) for its course. The page costs a constant number of queries however many
+    deliveries it holds: a count, the deliveries joined to their courses, the learner's
+    registrations for those courses, and the two local reads of learner_progress.
+    """
+    paginator = Paginator(enrolled_deliveries(learner), min(max(page_size, 1), ENROLLED_MAX_PAGE_SIZE))
+    page = paginator.get_page(page)
+    page.object_list = deliveries = list(page.object_list)
+
+    course_ids = {delivery.course.course_id for delivery in deliveries}
+    registrations = dict(
+        ScormCloudRegistration.objects.filter(learner=learner, course_id__in=course_ids)
+        .values_list('course_id', 'registration_id')
+    ) if course_ids else {}
+    progress = learner_progress(learner) if course_ids else {}
+    for delivery in deliveries:
+        delivery.registration_id = registrations.get(delivery.course.course_id)
+        delivery.progress = progress.get(delivery.course.course_id)
+    return page
+
+
+def enroll_delivery(delivery, progress=None, batch_size=ENROLLMENT_BATCH_SIZE, max_workers=None):
+    """
+    Registers every unregistered participant of ``delivery`` on ScormCloud.
+
+    Remote registrations are created ``max_workers`` at a time and each batch is saved with
+    one bulk_create, so an interrupted run loses at most one batch and simply resumes on the
+    next call. ``progress`` is called as ``progress(registered, failed, total)`` after each batch.
+    """
+    max_workers = max_workers or settings.CLOUDSCORM_ENROLLMENT_CONCURRENCY
+    course_id = delivery.course.course_id
+    registration_api = clients.registration_api()
+    participants = unregistered_participants(delivery)
+
+    total = participants.count()
+    registered = failed = 0
+    last_error = None
+    last_pk = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            batch = list(participants.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            futures = {}
+            for learner in batch:
+                registration_id = registration_id_for(learner, course_id)
+                future = executor.submit(create_remote_registration, registration_api, learner, course_id, registration_id)
+                futures[future] = (learner, registration_id)
+
+            created = []
+            for future in as_completed(futures):
+                learner, registration_id = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    last_error = f"Learner {learner.pk}: {e}"
+                    logger.error(f"Failed to register learner {learner.pk} for course {course_id}: {e}")
+                    continue
+                created.append(ScormCloudRegistration(registration_id=registration_id, learner=learner, course_id=course_id))
+
+            ScormCloudRegistration.objects.bulk_create(created, ignore_conflicts=True)
+            registered += len(created)
+            if progress:
+                progress(registered, failed, total)
+
+    logger.info(f"Enrollment for delivery {delivery.delivery_code}: {registered} registered, {failed} failed of {total}.")
+    return {'total': total, 'registered': registered, 'failed': failed, 'last_error': last_error}
@@ -0,0 +1,452 @@
+"""
+In-memory stand-in for the parts of the ScormCloud v2 API this project uses.
+
+Point the SDK at it with ``CLOUDSCORM_HOST=http://127.0.0.1:8099/api/v2`` to exercise the
+import, registration, launch and listing flows offline. Latency and failures are injected
+according to a ``FakeScormCloudConfig``, which can also be changed at runtime through
+``GET``/``POST /_fake/config``.
+"""
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = '/api/v2'
+
+
+@dataclass
+class FakeScormCloudConfig:
+    # Fixed delay added to every API request, plus up to ``jitter`` seconds of random delay
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Fraction of API requests answered with a 503, and with a 429 carrying Retry-After
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 1
+    # Seconds an import job stays RUNNING, and the fraction of imports that end in ERROR
+    import_seconds: float = 1.0
+    import_failure_rate: float = 0.0
+    # Items per page on listing endpoints before a ``more`` token is returned
+    page_size: int = 100
+    # When set, requests must authenticate with these basic credentials
+    app_id: str = None
+    secret_key: str = None
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _isoformat(value):
+    return value.isoformat().replace('+00:00', 'Z') if value else None
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class FakeScormCloudState:
+    """Courses, import jobs, registrations and app settings held by one fake server."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.courses = {}
+        self.import_jobs = {}
+        self.registrations = {}
+        self.settings = {}
+
+    def course_schema(self, course):
+        registration_count = sum(1 for r in self.registrations.values() if r['course_id'] == course['id'])
+        return {
+            'id': course['id'],
+            'title': course['title'],
+            'version': course['version'],
+            'created': _isoformat(course['created']),
+            'updated': _isoformat(course['updated']),
+            'registrationCount': registration_count,
+            'courseLearningStandard': 'SCORM_2004_4TH_EDITION',
+        }
+
+    def registration_schema(self, registration):
+        course = self.courses.get(registration['course_id'])
+        return {
+            'id': registration['id'],
+            'instance': 0,
+            'updated': _isoformat(registration['updated']),
+            'registrationCompletion': registration['completion'],
+            'registrationCompletionAmount': registration['completion_amount'],
+            'registrationSuccess': registration['success'],
+            'score': {'scaled': registration['score']} if registration['score'] is not None else None,
+            'totalSecondsTracked': registration['total_seconds_tracked'],
+            'firstAccessDate': _isoformat(registration['first_access_date']),
+            'lastAccessDate': _isoformat(registration['last_access_date']),
+            'completedDate': _isoformat(registration['completed_date']),
+            'createdDate': _isoformat(registration['created']),
+            'course': {
+                'id': registration['course_id'],
+                'title': course['title'] if course else None,
+                'version': course['version'] if course else 0,
+            },
+            'learner': registration['learner'],
+        }
+
+    def finish_import(self, job):
+        """Settles a RUNNING import job once its simulated processing time has elapsed."""
+        if job['status'] != 'RUNNING' or time.time() < job['ready_at']:
+            return
+        if job['fail']:
+            job['status'] = 'ERROR'
+            job['message'] = 'Simulated import failure'
+            return
+        now = _now()
+        course = self.courses.get(job['course_id'])
+        if course is None:
+            course = {'id': job['course_id'], 'title': job['title'], 'version': 0, 'created': now}
+            self.courses[course['id']] = course
+        else:
+            course['version'] += 1
+        course['updated'] = now
+        job['status'] = 'COMPLETE'
+        job['message'] = 'Import completed'
+
+
+class FakeScormCloudHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Routes are matched against the path below API_PREFIX, split on '/'
+    routes = [
+        ('POST', ('courses', 'importJobs', 'upload'), 'create_import_job'),
+        ('POST', ('courses', 'importJobs'), 'create_import_job'),
+        ('POST', ('courses', 'importJobs', 'noUpload'), 'create_import_job'),
+        ('GET', ('courses', 'importJobs', None), 'get_import_job'),
+        ('GET', ('courses',), 'list_courses'),
+        ('GET', ('courses', None), 'get_course'),
+        ('DELETE', ('courses', None), 'delete_course'),
+        ('GET', ('registrations',), 'list_registrations'),
+        ('POST', ('registrations',), 'create_registration'),
+        ('GET', ('registrations', None), 'get_registration'),
+        ('HEAD', ('registrations', None), 'get_registration'),
+        ('DELETE', ('registrations', None), 'delete_registration'),
+        ('POST', ('registrations', None, 'launchLink'), 'build_launch_link'),
+        ('GET', ('appManagement', 'configuration'), 'get_configuration'),
+        ('POST', ('appManagement', 'configuration'), 'set_configuration'),
+    ]
+
+    @property
+    def config(self):
+        return self.server.config
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def do_HEAD(self):
+        self._dispatch('HEAD')
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if url.path.startswith('/_fake/'):
+            return self._control(method, url.path[len('/_fake/'):].strip('/').split('/'))
+        if not url.path.startswith(API_PREFIX):
+            return self._error(404, f"Unknown path {url.path}")
+
+        parts = tuple(part for part in url.path[len(API_PREFIX):].split('/') if part)
+        for route_method, pattern, handler in self.routes:
+            if route_method != method or len(pattern) != len(parts):
+                continue
+            if all(expected is None or expected == part for expected, part in zip(pattern, parts)):
+                args = [part for expected, part in zip(pattern, parts) if expected is None]
+                break
+        else:
+            return self._error(404, f"No fake endpoint for {method} {url.path}")
+
+        if not self._authorized():
+            return self._error(401, 'Invalid credentials')
+        if self._inject_faults():
+            return
+        getattr(self, handler)(*args)
+
+    def _authorized(self):
+        header = self.headers.get('Authorization', '')
+        if not header.startswith('Basic '):
+            return False
+        if self.config.app_id is None:
+            return True
+        try:
+            app_id, _, secret_key = base64.b64decode(header[6:]).decode().partition(':')
+        except ValueError:
+            return False
+        return app_id == self.config.app_id and secret_key == self.config.secret_key
+
+    def _inject_faults(self):
+        config = self.config
+        delay = config.latency + random.uniform(0, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self._error(429, 'Simulated rate limit', headers={'Retry-After': str(config.retry_after)})
+            return True
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._error(503, 'Simulated service failure')
+            return True
+        return False
+
+    def _json_body(self):
+        return json.loads(self.body) if self.body else {}
+
+    def _send(self, status, payload=None, headers=None):
+        data = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if payload is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, {'message': message}, headers)
+
+    def _page(self, items, key):
+        start = int(self.query.get('more', 0))
+        end = start + self.config.page_size
+        payload = {key: items[start:end]}
+        if end < len(items):
+            payload['more'] = str(end)
+        self._send(200, payload)
+
+    # Courses
+
+    def create_import_job(self):
+        course_id = self.query.get('courseId')
+        if not course_id:
+            return self._error(400, 'courseId is required')
+        job_id = str(uuid.uuid4())
+        with self.state.lock:
+            self.state.import_jobs[job_id] = {
+                'id': job_id,
+                'course_id': course_id,
+                'title': f"Course {course_id}",
+                'status': 'RUNNING',
+                'message': 'Import in progress',
+                'ready_at': time.time() + self.config.import_seconds,
+                'fail': random.random() < self.config.import_failure_rate,
+            }
+        self._send(200, {'result': job_id})
+
+    def get_import_job(self, job_id):
+        with self.state.lock:
+            job = self.state.import_jobs.get(job_id)
+            if job is None:
+                return self._error(404, f"Import job {job_id} not found")
+            self.state.finish_import(job)
+            payload = {'jobId': job_id, 'status': job['status'], 'message': job['message']}
+            if job['status'] == 'COMPLETE':
+                course = self.state.courses[job['course_id']]
+                payload['importResult'] = {
+                    'webPathToCourse': f"/courses/{course['id']}/{course['version']}/",
+                    'parserWarnings': [],
+                    'course': self.state.course_schema(course),
+                }
+        self._send(200, payload)
+
+    def list_courses(self):
+        with self.state.lock:
+            courses = [self.state.course_schema(course) for course in self.state.courses.values()]
+        self._page(courses, 'courses')
+
+    def get_course(self, course_id):
+        with self.state.lock:
+            course = self.state.courses.get(course_id)
+            payload = self.state.course_schema(course) if course else None
+        if payload is None:
+            return self._error(404, f"Course {course_id} not found")
+        self._send(200, payload)
+
+    def delete_course(self, course_id):
+        with self.state.lock:
+            if self.state.courses.pop(course_id, None) is None:
+                return self._error(404, f"Course {course_id} not found")
+            self.state.registrations = {
+                key: registration for key, registration in self.state.registrations.items()
+                if registration['course_id'] != course_id
+            }
+        self._send(204)
+
+    # Registrations
+
+    def list_registrations(self):
+        query = self.query
+        datetime_field = 'created' if query.get('datetimeFilter') == 'created' else 'updated'
+        since = _parse_datetime(query['since']) if query.get('since') else None
+        until = _parse_datetime(query['until']) if query.get('until') else None
+        with self.state.lock:
+            registrations = [
+                registration for registration in self.state.registrations.values()
+                if (not query.get('courseId') or registration['course_id'] == query['courseId'])
+                and (not query.get('learnerId') or registration['learner']['id'] == query['learnerId'])
+                and (since is None or registration[datetime_field] >= since)
+                and (until is None or registration[datetime_field] <= until)
+            ]
+            order_by = query.get('orderBy', 'updated_asc')
+            sort_field = 'created' if order_by.startswith('created') else 'updated'
+            registrations.sort(key=lambda r: r[sort_field], reverse=order_by.endswith('_desc'))
+            payload = [self.state.registration_schema(registration) for registration in registrations]
+        self._page(payload, 'registrations')
+
+    def create_registration(self):
+        body = self._json_body()
+        registration_id = body.get('registrationId')
+        if not registration_id or not body.get('courseId') or not body.get('learner', {}).get('id'):
+            return self._error(400, 'registrationId, courseId and learner.id are required')
+        now = _now()
+        with self.state.lock:
+            if registration_id in self.state.registrations:
+                return self._error(400, f"Registration {registration_id} already exists")
+            self.state.registrations[registration_id] = {
+                'id': registration_id,
+                'course_id': body['courseId'],
+                'learner': body['learner'],
+                'completion': 'INCOMPLETE',
+                'completion_amount': 0,
+                'success': 'UNKNOWN',
+                'score': None,
+                'total_seconds_tracked': 0,
+                'first_access_date': None,
+                'last_access_date': None,
+                'completed_date': None,
+                'created': now,
+                'updated': now,
+            }
+        self._send(204)
+
+    def get_registration(self, registration_id):
+        with self.state.lock:
+            registration = self.state.registrations.get(registration_id)
+            payload = self.state.registration_schema(registration) if registration else None
+        if payload is None:
+            return self._error(404, f"Registration {registration_id} not found")
+        self._send(200, payload)
+
+    def delete_registration(self, registration_id):
+        with self.state.lock:
+            if self.state.registrations.pop(registration_id, None) is None:
+                return self._error(404, f"Registration {registration_id} not found")
+        self._send(204)
+
+    def build_launch_link(self, registration_id):
+        body = self._json_body()
+        with self.state.lock:
+            registration = self.state.registrations.get(registration_id)
+            if registration is not None:
+                registration['redirect_on_exit_url'] = body.get('redirectOnExitUrl')
+        if registration is None:
+            return self._error(404, f"Registration {registration_id} not found")
+        host = self.headers.get('Host', f"{self.server.server_address[0]}:{self.server.server_address[1]}")
+        self._send(200, {'launchLink': f"http://{host}/_fake/launch/{registration_id}"})
+
+    # Application management
+
+    def get_configuration(self):
+        with self.state.lock:
+            items = [{'id': key, 'value': value} for key, value in self.state.settings.items()]
+        self._send(200, {'settingItems': items})
+
+    def set_configuration(self):
+        body = self._json_body()
+        with self.state.lock:
+            for item in body.get('settings', []):
+                self.state.settings[item['settingId']] = item.get('value')
+        self._send(204)
+
+    # Control endpoints, never slowed down or failed
+
+    def _control(self, method, parts):
+        if parts == ['config']:
+            if method == 'POST':
+                known = {field.name for field in fields(FakeScormCloudConfig)}
+                for key, value in self._json_body().items():
+                    if key not in known:
+                        return self._error(400, f"Unknown setting {key}")
+                    setattr(self.config, key, value)
+            return self._send(200, asdict(self.config))
+
+        if parts == ['reset'] and method == 'POST':
+            self.server.state = FakeScormCloudState()
+            return self._send(204)
+
+        if len(parts) == 2 and parts[0] == 'launch' and method == 'GET':
+            return self._launch(parts[1])
+
+        self._error(404, f"Unknown control path /_fake/{'/'.join(parts)}")
+
+    def _launch(self, registration_id):
+        """Simulates a learner playing the course to completion, then follows the exit redirect."""
+        now = _now()
+        with self.state.lock:
+            registration = self.state.registrations.get(registration_id)
+            if registration is None:
+                return self._error(404, f"Registration {registration_id} not found")
+            registration.update({
+                'completion': 'COMPLETED',
+                'completion_amount': 1,
+                'success': 'PASSED',
+                'score': 1,
+                'total_seconds_tracked': registration['total_seconds_tracked'] + 60,
+                'first_access_date': registration['first_access_date'] or now,
+                'last_access_date': now,
+                'completed_date': registration['completed_date'] or now,
+                'updated': now,
+            })
+            redirect_url = registration.get('redirect_on_exit_url')
+        if redirect_url:
+            return self._send(302, headers={'Location': redirect_url})
+        self._send(200, {'registrationId': registration_id, 'completion': 'COMPLETED'})
+
+
+class FakeScormCloudServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config=None, verbose=False):
+        super().__init__(address, FakeScormCloudHandler)
+        self.config = config or FakeScormCloudConfig()
+        self.state = FakeScormCloudState()
+        self.verbose = verbose
+
+    @property
+    def api_host(self):
+        """Value for ``CLOUDSCORM_HOST`` that points the SDK at this server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+
+def start_fake_scorm_cloud(host='127.0.0.1', port=0, config=None, verbose=False):
+    """Starts a fake server on a background thread and returns it; call ``shutdown()`` to stop."""
+    server = FakeScormCloudServer((host, port), config=config, verbose=verbose)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,469 @@
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_duration
+import rustici_software_cloud_v2 as scorm_cloud
+
+from accounts.models import Learner
+from . import clients
+from .batch_import import IMPORT_TIMEOUT, collect_packages, import_packages, summarize
+from .enrollment import enroll_delivery
+from .models import (
+    BulkEnrollmentJob, CourseBatchImport, CourseDeletionJob, CourseDelivery, CourseImportJob, RegistrationEvent,
+    RegistrationRefresh, ScormCloudCourse, ScormCloudOutbox, ScormCloudRegistration,
+)
+from .progress import registration_from_payload, upsert_progress
+from .services import create_remote_registration, register_learner
+
+logger = logging.getLogger(__name__)
+
+# Import status polling backs off exponentially between these bounds (seconds)
+POLL_INTERVAL_MIN = 1
+POLL_INTERVAL_MAX = 30
+# How long a worker holds a claimed job before another worker may pick it up
+CLAIM_LEASE = timedelta(minutes=2)
+# Batch imports only report progress between packages, so their lease outlasts one ScormCloud import
+BATCH_IMPORT_LEASE = timedelta(seconds=IMPORT_TIMEOUT) + CLAIM_LEASE
+# Failed submissions to ScormCloud are retried this many times before giving up
+MAX_SUBMIT_ATTEMPTS = 5
+# Rows removed per statement while cleaning up after a deleted course
+DELETION_BATCH_SIZE = 500
+# Outbox entries claimed per relay pass
+OUTBOX_BATCH_SIZE = 100
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(POLL_INTERVAL_MIN * 2 ** attempts, POLL_INTERVAL_MAX))
+
+
+def _claim(model, due_field, limit, lease=CLAIM_LEASE):
+    """Lease up to ``limit`` due jobs so concurrent workers don't double-process them."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            model.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['PENDING', 'RUNNING'], **{f'{due_field}__lte': now})
+            .order_by(due_field)[:limit]
+        )
+        if jobs:
+            model.objects.filter(pk__in=[job.pk for job in jobs]).update(**{due_field: now + lease})
+    return jobs
+
+
+def claim_import_jobs(limit=10):
+    return _claim(CourseImportJob, 'next_poll_at', limit)
+
+
+def process_import_jobs(limit=10):
+    """Advance every due import job by one step. Returns the number of jobs handled."""
+    jobs = claim_import_jobs(limit)
+    if not jobs:
+        return 0
+
+    course_api = clients.course_api()
+
+    for job in jobs:
+        try:
+            if job.status == 'PENDING':
+                _submit_import(course_api, job)
+            else:
+                _poll_import(course_api, job)
+        except Exception as e:
+            logger.exception(f"Unexpected error while processing import job {job.id}")
+            _fail(job, f"Unexpected error: {e}")
+    return len(jobs)
+
+
+def _submit_import(course_api, job):
+    try:
+        logger.info(f"Submitting import job {job.id} for course {job.course_id}.")
+        response = course_api.create_upload_and_import_course_job(
+            job.course_id,
+            file=job.package.path,
+            may_create_new_version=ScormCloudCourse.objects.filter(course_id=job.course_id).exists(),
+        )
+    except scorm_cloud.rest.ApiException as e:
+        job.attempts += 1
+        if job.attempts >= MAX_SUBMIT_ATTEMPTS:
+            _fail(job, f"Course upload failed: {e.reason}")
+            return
+        logger.warning(f"Upload for import job {job.id} failed (attempt {job.attempts}): {e.reason}")
+        job.message = str(e.reason)
+        job.next_poll_at = timezone.now() + _backoff(job.attempts)
+        job.save(update_fields=['attempts', 'message', 'next_poll_at', 'updated_at'])
+        return
+
+    job.scorm_job_id = response.result
+    job.status = 'RUNNING'
+    job.attempts = 0
+    job.message = None
+    job.next_poll_at = timezone.now() + _backoff(0)
+    job.save(update_fields=['scorm_job_id', 'status', 'attempts', 'message', 'next_poll_at', 'updated_at'])
+
+
+def _poll_import(course_api, job):
+    try:
+        job_result = course_api.get_import_job_status(job.scorm_job_id)
+    except scorm_cloud.rest.ApiException as e:
+        logger.warning(f"Status check for import job {job.id} failed: {e.reason}")
+        job_result = None
+
+    if job_result is None or job_result.status == 'RUNNING':
+        job.attempts += 1
+        job.next_poll_at = timezone.now() + _backoff(job.attempts)
+        job.save(update_fields=['attempts', 'next_poll_at', 'updated_at'])
+        return
+
+    if job_result.status == 'ERROR':
+        logger.error(f"Course import failed for job {job.id}: {job_result.message}")
+        _fail(job, f"Course import failed: {job_result.message}")
+        return
+
+    course = _save_course(job, job_result)
+    if course is None:
+        logger.warning(f"Import job {job.id} finished after course {job.course_id} was deleted; discarding it.")
+        _fail(job, 'The course was deleted while it was being imported')
+        return
+    job.status = 'COMPLETE'
+    job.message = None
+    job.package.delete(save=False)
+    job.save()
+    logger.info(f"Import job {job.id} completed; course {course.course_id} saved.")
+
+    if job.created_by_id:
+        _register_publisher(job, course)
+
+
+def _fail(job, message):
+    job.status = 'ERROR'
+    job.message = message
+    if job.package:
+        job.package.delete(save=False)
+    job.save()
+
+
+def _save_course(job, job_result):
+    course_data = job_result.import_result.course
+    defaults = {
+        'title': course_data.title,
+        'version': course_data.version,
+        'created_at': course_data.created,
+        'updated_at': course_data.updated,
+        'web_path': job_result.import_result.web_path_to_course,
+        'published_by': job.created_by,
+        'package_sha256': job.package_sha256 or None,
+    }
+    defaults.update(job.course_fields)
+    if defaults.get('duration'):
+        defaults['duration'] = parse_duration(defaults['duration'])
+    if job.cover_image:
+        defaults['cover_image'] = job.cover_image.name
+
+    with transaction.atomic():
+        # A course deleted while its import ran stays deleted; the deletion job removes the
+        # version ScormCloud just imported along with the rest
+        if ScormCloudCourse.all_objects.select_for_update().filter(course_id=course_data.id, deleted_at__isnull=False).exists():
+            CourseDeletionJob.objects.filter(course_id=course_data.id, status__in=['PENDING', 'RUNNING']).update(remote_deleted=False)
+            return None
+        course, _ = ScormCloudCourse.all_objects.update_or_create(course_id=course_data.id, defaults=defaults)
+    return course
+
+
+def _register_publisher(job, course):
+    """Registers the publishing administrator as a learner so they can preview the course."""
+    try:
+        learner = Learner.objects.select_related('user').get(user_id=job.created_by_id)
+    except Learner.DoesNotExist:
+        logger.error(f"Learner object not found for publisher of import job {job.id}")
+        return
+
+    try:
+        register_learner(learner, course.course_id)
+        logger.info(f"Publisher registered for course: {course.course_id}, Learner ID: {learner.id}")
+    except ValueError:
+        pass
+    except Exception as e:
+        logger.error(f"Error registering publisher for course {course.course_id}: {e}")
+
+
+def process_enrollment_jobs(limit=1):
+    """Runs due bulk enrollment jobs to completion. Returns the number of jobs handled."""
+    jobs = _claim(BulkEnrollmentJob, 'next_run_at', limit)
+    for job in jobs:
+        job.status = 'RUNNING'
+        job.save(update_fields=['status', 'updated_at'])
+
+        def progress(registered, failed, total, job=job):
+            # Doubles as a heartbeat that keeps the lease while the job is running
+            BulkEnrollmentJob.objects.filter(pk=job.pk).update(
+                registered=registered,
+                failed=failed,
+                total=total,
+                next_run_at=timezone.now() + CLAIM_LEASE,
+                updated_at=timezone.now(),
+            )
+
+        try:
+            result = enroll_delivery(job.delivery, progress=progress)
+        except Exception as e:
+            logger.exception(f"Unexpected error while processing enrollment job {job.pk}")
+            BulkEnrollmentJob.objects.filter(pk=job.pk).update(status='ERROR', message=f"Unexpected error: {e}", updated_at=timezone.now())
+            continue
+
+        BulkEnrollmentJob.objects.filter(pk=job.pk).update(
+            status='ERROR' if result['failed'] else 'COMPLETE',
+            registered=result['registered'],
+            failed=result['failed'],
+            total=result['total'],
+            message=result['last_error'],
+            updated_at=timezone.now(),
+        )
+    return len(jobs)
+
+
+def process_batch_imports(limit=1):
+    """Runs due batch course imports to completion. Returns the number of batches handled."""
+    batches = _claim(CourseBatchImport, 'next_run_at', limit, lease=BATCH_IMPORT_LEASE)
+    for batch in batches:
+        batch.status = 'RUNNING'
+        batch.save(update_fields=['status', 'updated_at'])
+
+        def progress(processed, total, batch=batch):
+            # Doubles as a heartbeat that keeps the lease while the batch is running
+            CourseBatchImport.objects.filter(pk=batch.pk).update(
+                processed=processed,
+                total=total,
+                next_run_at=timezone.now() + BATCH_IMPORT_LEASE,
+                updated_at=timezone.now(),
+            )
+
+        try:
+            with tempfile.TemporaryDirectory() as workdir:
+                packages = collect_packages(batch.archive.path, workdir)
+                report = import_packages(packages, published_by=batch.created_by, course_fields=batch.course_fields, progress=progress)
+        except Exception as e:
+            logger.exception(f"Unexpected error while processing batch import {batch.pk}")
+            CourseBatchImport.objects.filter(pk=batch.pk).update(status='ERROR', message=f"Unexpected error: {e}", updated_at=timezone.now())
+            continue
+
+        counts = summarize(report)
+        batch.archive.delete(save=False)
+        CourseBatchImport.objects.filter(pk=batch.pk).update(
+            status='ERROR' if counts['failed'] else 'COMPLETE',
+            archive=None,
+            processed=len(report),
+            total=len(report),
+            report=report,
+            message=', '.join(f"{count} {status}" for status, count in counts.items()),
+            updated_at=timezone.now(),
+        )
+    return len(batches)
+
+
+def process_deletion_jobs(limit=1):
+    """Runs due course deletion jobs. Returns the number of jobs handled."""
+    jobs = _claim(CourseDeletionJob, 'next_run_at', limit)
+    for job in jobs:
+        job.status = 'RUNNING'
+        job.save(update_fields=['status', 'updated_at'])
+        try:
+            _delete_course(job)
+        except Exception as e:
+            logger.exception(f"Unexpected error while processing deletion job {job.pk}")
+            CourseDeletionJob.objects.filter(pk=job.pk).update(status='ERROR', message=f"Unexpected error: {e}", updated_at=timezone.now())
+    return len(jobs)
+
+
+def _delete_in_batches(queryset, job, counter):
+    """Deletes ``queryset`` a batch of primary keys at a time, recording progress on ``job``."""
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:DELETION_BATCH_SIZE])
+        if not pks:
+            return
+        queryset.model.objects.filter(pk__in=pks).delete()
+        setattr(job, counter, getattr(job, counter) + len(pks))
+        # Doubles as a heartbeat that keeps the lease while the job is running
+        CourseDeletionJob.objects.filter(pk=job.pk).update(
+            **{counter: getattr(job, counter)},
+            next_run_at=timezone.now() + CLAIM_LEASE,
+            updated_at=timezone.now(),
+        )
+
+
+def _delete_course(job):
+    if not job.remote_deleted:
+        try:
+            # ScormCloud drops the course's registrations along with it
+            clients.course_api().delete_course(job.course_id)
+        except scorm_cloud.rest.ApiException as e:
+            if e.status != 404:
+                job.attempts += 1
+                if job.attempts >= MAX_SUBMIT_ATTEMPTS:
+                    job.status = 'ERROR'
+                    job.message = f"ScormCloud course deletion failed: {e.reason}"
+                    job.save(update_fields=['attempts', 'status', 'message', 'updated_at'])
+                    return
+                logger.warning(f"ScormCloud deletion for job {job.pk} failed (attempt {job.attempts}): {e.reason}")
+                job.message = str(e.reason)
+                job.next_run_at = timezone.now() + _backoff(job.attempts)
+                job.save(update_fields=['attempts', 'message', 'next_run_at', 'updated_at'])
+                return
+        job.remote_deleted = True
+        job.message = None
+        job.save(update_fields=['remote_deleted', 'message', 'updated_at'])
+
+    _delete_in_batches(ScormCloudRegistration.objects.filter(course_id=job.course_id), job, 'registrations_deleted')
+    # Enrollments, attendance and feedback cascade with each delivery
+    _delete_in_batches(CourseDelivery.objects.filter(course__course_id=job.course_id), job, 'deliveries_deleted')
+    ScormCloudCourse.all_objects.filter(course_id=job.course_id).delete()
+
+    CourseDeletionJob.objects.filter(pk=job.pk).update(status='COMPLETE', updated_at=timezone.now())
+    logger.info(f"Deletion job {job.pk} completed; course {job.course_id} removed with "
+                f"{job.registrations_deleted} registrations and {job.deliveries_deleted} deliveries.")
+
+
+def process_registration_events(limit=500):
+    """
+    Applies queued ScormCloud postbacks. Bursts of events for the same registration are
+    coalesced so only its latest state is written. Returns the number of events consumed.
+    """
+    with transaction.atomic():
+        events = list(
+            RegistrationEvent.objects.select_for_update(skip_locked=True).order_by('pk')[:limit]
+        )
+        if not events:
+            return 0
+
+        # Later events win; ordering by pk keeps the most recently received payload
+        latest = {}
+        for event in events:
+            latest[event.registration_id] = event.payload
+
+        registrations = []
+        for registration_id, payload in latest.items():
+            try:
+                registrations.append(registration_from_payload(payload))
+            except Exception as e:
+                logger.error(f"Discarding malformed postback for registration {registration_id}: {e}")
+        upsert_progress(registrations)
+        RegistrationEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+
+    logger.info(f"Applied {len(events)} registration events for {len(latest)} registrations.")
+    return len(events)
+
+
+def process_registration_refreshes(limit=50):
+    """
+    Re-reads the progress of registrations queued by progress.request_registration_refresh.
+    Returns the number of refreshes handled.
+    """
+    with transaction.atomic():
+        refreshes = list(
+            RegistrationRefresh.objects.select_for_update(skip_locked=True)
+            .filter(next_run_at__lte=timezone.now())
+            .order_by('next_run_at')[:limit]
+        )
+        # Taken off the queue before calling ScormCloud, so requests arriving meanwhile queue a fresh read
+        RegistrationRefresh.objects.filter(pk__in=[refresh.pk for refresh in refreshes]).delete()
+    if not refreshes:
+        return 0
+
+    registration_api = clients.registration_api()
+    registrations = []
+    for refresh in refreshes:
+        try:
+            registrations.append(registration_api.get_registration_progress(str(refresh.registration_id)))
+        except scorm_cloud.rest.ApiException as e:
+            if e.status == 404 or refresh.attempts + 1 >= MAX_SUBMIT_ATTEMPTS:
+                logger.error(f"Giving up refreshing registration {refresh.registration_id}: {e.reason}")
+                continue
+            logger.warning(f"Refreshing registration {refresh.registration_id} failed: {e.reason}")
+            RegistrationRefresh.objects.get_or_create(
+                registration_id=refresh.registration_id,
+                defaults={'attempts': refresh.attempts + 1, 'next_run_at': timezone.now() + _backoff(refresh.attempts + 1)},
+            )
+    upsert_progress(registrations)
+    return len(refreshes)
+
+
+def _create_registration(registration_api, entry, registrations):
+    registration = registrations.get(entry.registration_id)
+    if registration is None:
+        # Deleted locally before it was delivered; there is nothing left to mirror
+        return
+    create_remote_registration(registration_api, registration.learner, registration.course_id, registration.registration_id)
+
+
+OUTBOX_HANDLERS = {
+    'create_registration': _create_registration,
+}
+
+
+def process_outbox(limit=OUTBOX_BATCH_SIZE):
+    """Relays due ScormCloudOutbox entries to ScormCloud. Returns the number of entries handled."""
+    entries = _claim(ScormCloudOutbox, 'next_run_at', limit)
+    deliver_outbox(entries)
+    return len(entries)
+
+
+def flush_outbox(registration_id):
+    """
+    Tries to deliver a registration's pending outbox entries right away, e.g. before it is
+    launched. A failure here doesn't count against the entries' attempts; the relay keeps
+    retrying them on its own schedule. Returns whether any entry is still undelivered.
+    """
+    entries = list(ScormCloudOutbox.objects.filter(registration_id=registration_id, status__in=['PENDING', 'ERROR']))
+    pending = [entry for entry in entries if entry.status == 'PENDING']
+    return deliver_outbox(pending, count_attempts=False) < len(entries)
+
+
+def deliver_outbox(entries, count_attempts=True):
+    """
+    Sends outbox entries to ScormCloud and records each outcome. Returns the number delivered.
+
+    Every handler is idempotent on the registration id, so an entry delivered twice (by the
+    relay and a launch racing it, or after a crash before its status was saved) is harmless.
+    Without ``count_attempts``, failed entries are left exactly as they were.
+    """
+    if not entries:
+        return 0
+    registrations = ScormCloudRegistration.objects.select_related('learner__user').in_bulk(
+        [entry.registration_id for entry in entries]
+    )
+    registration_api = clients.registration_api()
+
+    def send(entry):
+        try:
+            OUTBOX_HANDLERS[entry.operation](registration_api, entry, registrations)
+        except Exception as e:
+            return e
+        return None
+
+    with ThreadPoolExecutor(max_workers=min(settings.CLOUDSCORM_ENROLLMENT_CONCURRENCY, len(entries))) as executor:
+        errors = list(executor.map(send, entries))
+
+    now = timezone.now()
+    delivered = [entry.pk for entry, error in zip(entries, errors) if error is None]
+    ScormCloudOutbox.objects.filter(pk__in=delivered).update(status='COMPLETE', message=None, delivered_at=now)
+
+    for entry, error in zip(entries, errors):
+        if error is None:
+            continue
+        if not count_attempts:
+            logger.warning(f"Inline delivery of outbox entry {entry.pk} failed: {getattr(error, 'reason', None) or error}")
+            continue
+        entry.attempts += 1
+        entry.message = str(getattr(error, 'reason', None) or error)
+        if entry.attempts >= MAX_SUBMIT_ATTEMPTS:
+            entry.status = 'ERROR'
+            logger.error(f"Giving up on outbox entry {entry.pk} ({entry.operation} {entry.registration_id}): {entry.message}")
+        else:
+            entry.next_run_at = now + _backoff(entry.attempts)
+            logger.warning(f"Outbox entry {entry.pk} failed (attempt {entry.attempts}): {entry.message}")
+        entry.save(update_fields=['attempts', 'message', 'status', 'next_run_at'])
+    return len(delivered)
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import reverse
+
+from . import clients
+from .jobs import flush_outbox
+
+# Lifetime requested from ScormCloud for each launch link (seconds)
+LAUNCH_LINK_EXPIRY = 3600
+# Links are rebuilt this long before they expire so a learner never opens a stale one
+LAUNCH_LINK_SAFETY_MARGIN = 300
+
+
+class RegistrationPending(Exception):
+    """The registration hasn't reached ScormCloud yet, so it can't be launched."""
+
+
+class LaunchLinkCache:
+    """
+    Two-tier cache of ScormCloud launch links keyed by (registration id, learner id).
+
+    The first tier is a bounded in-process LRU. When ``LAUNCH_LINK_CACHE_ALIAS`` names a
+    Django cache, links are also shared through it so other workers can reuse them.
+    """
+
+    def __init__(self, max_size, shared_alias=None):
+        self.max_size = max_size
+        self.shared_alias = shared_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    @staticmethod
+    def _key(registration_id, learner_id):
+        return f"scorm_launch_link:{registration_id}:{learner_id}"
+
+    def get(self, registration_id, learner_id):
+        key = self._key(registration_id, learner_id)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] - LAUNCH_LINK_SAFETY_MARGIN > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.shared is not None:
+            entry = self.shared.get(key)
+            if entry and entry[1] - LAUNCH_LINK_SAFETY_MARGIN > now:
+                self._store_local(key, entry)
+                with self._lock:
+                    self.shared_hits += 1
+                return entry[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, registration_id, learner_id, launch_link, expires_at):
+        key = self._key(registration_id, learner_id)
+        entry = (launch_link, expires_at)
+        self._store_local(key, entry)
+        if self.shared is not None:
+            timeout = int(expires_at - LAUNCH_LINK_SAFETY_MARGIN - time.time())
+            if timeout > 0:
+                self.shared.set(key, entry, timeout)
+
+    def delete(self, registration_id, learner_id):
+        key = self._key(registration_id, learner_id)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def _store_local(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else None,
+            }
+
+
+launch_link_cache = LaunchLinkCache(
+    max_size=settings.LAUNCH_LINK_CACHE_SIZE,
+    shared_alias=settings.LAUNCH_LINK_CACHE_ALIAS,
+)
+
+
+def get_launch_link(registration_id, learner_id, tenant=None):
+    """
+    Returns a launch link for the registration, reusing a cached one while it is still valid.
+    Raises RegistrationPending while the registration is still waiting in the outbox.
+    """
+    launch_link = launch_link_cache.get(registration_id, learner_id)
+    if launch_link:
+        return launch_link
+
+    # A registration made moments ago may still be waiting in the outbox
+    if flush_outbox(registration_id):
+        raise RegistrationPending(f"Registration {registration_id} has not reached ScormCloud yet")
+
+    launch_link_request = {
+        "launchAuth": {
+            "type": "vault"
+        },
+        "expiry": LAUNCH_LINK_EXPIRY,
+        "tracking": True
+    }
+    if settings.DOMAIN_NAME:
+        # Leaving the player refreshes this registration's progress; see learner.views.registration_exit
+        launch_link_request["redirectOnExitUrl"] = settings.DOMAIN_NAME + reverse('learner_registration_exit', args=[registration_id])
+    expires_at = time.time() + LAUNCH_LINK_EXPIRY
+    launch_link_response = clients.registration_api(tenant).build_registration_launch_link(
+        registration_id=str(registration_id),
+        launch_link_request=launch_link_request,
+    )
+    launch_link_cache.set(registration_id, learner_id, launch_link_response.launch_link, expires_at)
+    return launch_link_response.launch_link
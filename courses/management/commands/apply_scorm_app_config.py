@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from rustici_software_cloud_v2.rest import ApiException
+
+from courses.app_config import apply_application_configuration
+from courses.clients import tenants_with_credentials
+
+
+class Command(BaseCommand):
+    help = 'Pushes the ScormCloud application configuration to every app whose applied settings are out of date.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Push even if the stored hash matches.')
+        parser.add_argument('--tenants', action='store_true', help='Also reconcile every tenant with its own ScormCloud credentials.')
+
+    def handle(self, *args, **options):
+        targets = [None]
+        if options['tenants']:
+            targets += list(tenants_with_credentials())
+
+        for tenant in targets:
+            label = tenant.subdomain if tenant else 'default'
+            try:
+                pushed = apply_application_configuration(tenant, force=options['force'])
+            except ApiException as e:
+                self.stderr.write(f"{label}: failed to apply configuration: {e.reason}")
+                continue
+            self.stdout.write(f"{label}: {'applied' if pushed else 'already up to date'}")
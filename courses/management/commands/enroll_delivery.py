@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.enrollment import enroll_delivery
+from courses.models import CourseDelivery
+
+
+class Command(BaseCommand):
+    help = 'Registers every participant of a course delivery on ScormCloud. Safe to re-run after a partial failure.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('delivery_code', help='Delivery code of the CourseDelivery to enroll.')
+        parser.add_argument('--workers', type=int, default=None, help='Concurrent ScormCloud requests.')
+        parser.add_argument('--batch-size', type=int, default=100, help='Registrations saved per bulk insert.')
+
+    def handle(self, *args, **options):
+        try:
+            delivery = CourseDelivery.objects.select_related('course').get(delivery_code=options['delivery_code'])
+        except CourseDelivery.DoesNotExist:
+            raise CommandError(f"Course delivery {options['delivery_code']} does not exist.")
+
+        def progress(registered, failed, total):
+            self.stdout.write(f"{registered + failed}/{total} processed ({failed} failed)")
+
+        result = enroll_delivery(delivery, progress=progress, batch_size=options['batch_size'], max_workers=options['workers'])
+        self.stdout.write(f"Registered {result['registered']} of {result['total']} participants.")
+        if result['failed']:
+            raise CommandError(f"{result['failed']} registrations failed; re-run to retry them. Last error: {result['last_error']}")
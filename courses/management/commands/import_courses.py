@@ -0,0 +1,50 @@
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.batch_import import BATCH_IMPORT_WORKERS, collect_packages, import_packages, summarize, write_report
+
+
+class Command(BaseCommand):
+    help = 'Imports every SCORM package in a directory or an outer zip archive into ScormCloud.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory of package zips, or a zip archive containing them.')
+        parser.add_argument('--workers', type=int, default=BATCH_IMPORT_WORKERS, help='Packages imported concurrently.')
+        parser.add_argument('--published-by', help='Username recorded as publisher and registered to preview each course.')
+        parser.add_argument('--category', help='Category given to every imported course.')
+        parser.add_argument('--report', help='Write the per-package CSV report here instead of stdout.')
+
+    def handle(self, *args, **options):
+        published_by = None
+        if options['published_by']:
+            published_by = get_user_model().objects.filter(username=options['published_by']).first()
+            if published_by is None:
+                raise CommandError(f"No user named {options['published_by']}")
+
+        def progress(done, total):
+            self.stderr.write(f"\r{done}/{total} packages processed", ending='')
+
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                packages = collect_packages(options['source'], workdir)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stderr.write(f"Found {len(packages)} packages in {options['source']}.")
+            report = import_packages(
+                packages,
+                published_by=published_by,
+                course_fields={'category': options['category']},
+                max_workers=options['workers'],
+                progress=progress,
+            )
+        self.stderr.write('')
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as f:
+                write_report(report, f)
+        else:
+            write_report(report, sys.stdout)
+        self.stderr.write(', '.join(f"{count} {status}" for status, count in summarize(report).items()))
@@ -0,0 +1,30 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from rustici_software_cloud_v2.rest import ApiException
+
+from courses.reconcile import REPORT_FIELDS, SORT_RUN_SIZE, reconcile_registrations
+
+
+class Command(BaseCommand):
+    help = 'Diffs local registrations against ScormCloud in constant memory and reports or repairs the drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Re-create registrations missing on ScormCloud and record remote-only ones locally.')
+        parser.add_argument('--report', help='Write one CSV row per drifted registration to this path.')
+        parser.add_argument('--run-size', type=int, default=SORT_RUN_SIZE, help='Remote ids sorted in memory at a time.')
+
+    def handle(self, *args, **options):
+        report_file = open(options['report'], 'w', newline='') if options['report'] else None
+        try:
+            report = None
+            if report_file:
+                report = csv.writer(report_file)
+                report.writerow(REPORT_FIELDS)
+            counts = reconcile_registrations(repair=options['repair'], report=report, run_size=options['run_size'])
+        except ApiException as e:
+            raise CommandError(f"Reconciliation failed: {e.reason}")
+        finally:
+            if report_file:
+                report_file.close()
+        self.stdout.write(', '.join(f"{count} {name}" for name, count in counts.items()))
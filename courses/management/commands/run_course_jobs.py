@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rustici_software_cloud_v2.rest import ApiException
+
+from courses.app_config import apply_application_configuration
+from courses.jobs import (
+    process_batch_imports, process_deletion_jobs, process_enrollment_jobs, process_import_jobs, process_registration_events,
+    process_outbox, process_registration_refreshes,
+)
+from courses.uploads import expire_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Runs the background worker that drives queued course jobs against ScormCloud.'
+
+    queues = {
+        'imports': process_import_jobs,
+        'enrollments': process_enrollment_jobs,
+        'batches': process_batch_imports,
+        'deletions': process_deletion_jobs,
+        'events': process_registration_events,
+        'refreshes': process_registration_refreshes,
+        'outbox': process_outbox,
+        'uploads': expire_stale_uploads,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the currently due jobs and exit.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when no job is due.')
+        parser.add_argument(
+            '--queues', nargs='+', choices=list(self.queues), default=list(self.queues),
+            help='Queues to serve. Run a dedicated "events refreshes" worker to keep progress flowing during long enrollments.',
+        )
+
+    def handle(self, *args, **options):
+        processors = [self.queues[queue] for queue in options['queues']]
+        self.stdout.write(f"Course job worker started for: {', '.join(options['queues'])}.")
+        try:
+            # Reconcile the ScormCloud application configuration on startup
+            apply_application_configuration()
+        except ApiException as e:
+            self.stderr.write(f"Could not apply ScormCloud application configuration: {e.reason}")
+
+        while True:
+            processed = sum(processor() for processor in processors)
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from courses.fake_scorm_cloud import FakeScormCloudConfig, FakeScormCloudServer
+
+
+class Command(BaseCommand):
+    help = 'Serves an in-memory fake of the ScormCloud API for offline testing and benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='127.0.0.1', help='Address to listen on.')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every API request.')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra random seconds per request.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503.')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with 429.')
+        parser.add_argument('--import-seconds', type=float, default=1.0, help='Time an import job stays RUNNING.')
+        parser.add_argument('--import-failure-rate', type=float, default=0.0, help='Fraction of import jobs that end in ERROR.')
+        parser.add_argument('--page-size', type=int, default=100, help='Items per page on listing endpoints.')
+        parser.add_argument('--app-id', help='Require these basic credentials instead of accepting any.')
+        parser.add_argument('--secret-key')
+        parser.add_argument('--verbose', action='store_true', help='Log every request.')
+
+    def handle(self, *args, **options):
+        config = FakeScormCloudConfig(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            import_seconds=options['import_seconds'],
+            import_failure_rate=options['import_failure_rate'],
+            page_size=options['page_size'],
+            app_id=options['app_id'],
+            secret_key=options['secret_key'],
+        )
+        server = FakeScormCloudServer((options['bind'], options['port']), config=config, verbose=options['verbose'])
+        self.stdout.write(f"Fake ScormCloud listening; set CLOUDSCORM_HOST={server.api_host}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
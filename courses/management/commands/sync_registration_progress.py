@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from rustici_software_cloud_v2.rest import ApiException
+
+from courses.clients import tenants_with_credentials
+from courses.progress import sync_registration_progress
+
+
+class Command(BaseCommand):
+    help = 'Pulls registration progress changed on ScormCloud since the last sync into RegistrationProgress.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignore the high-water mark and resync every registration.')
+        parser.add_argument('--tenants', action='store_true', help='Also sync every tenant with its own ScormCloud credentials.')
+
+    def handle(self, *args, **options):
+        targets = [None]
+        if options['tenants']:
+            targets += list(tenants_with_credentials())
+
+        for tenant in targets:
+            label = tenant.subdomain if tenant else 'default'
+            try:
+                result = sync_registration_progress(tenant, full=options['full'])
+            except ApiException as e:
+                raise CommandError(f"{label}: sync failed: {e.reason}")
+            self.stdout.write(f"{label}: {result['fetched']} fetched, {result['saved']} saved, up to {result['high_water_mark']}")
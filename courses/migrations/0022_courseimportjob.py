@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:33
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0021_alter_scormcloudcourse_cover_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('course_id', models.CharField(max_length=50)),
+                ('package', models.FileField(blank=True, null=True, upload_to='course_packages/')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETE', 'Complete'), ('ERROR', 'Error')], default='PENDING', max_length=20)),
+                ('scorm_job_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('message', models.TextField(blank=True, null=True)),
+                ('course_fields', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('cover_image', models.ImageField(blank=True, null=True, upload_to='course_covers/')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_poll_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='course_import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_poll_at'], name='courses_cou_status_57e113_idx')],
+            },
+        ),
+    ]
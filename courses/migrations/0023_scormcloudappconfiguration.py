@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0022_courseimportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScormCloudAppConfiguration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('app_id', models.CharField(max_length=100, unique=True)),
+                ('settings_hash', models.CharField(max_length=64)),
+                ('applied_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0024_bulkenrollmentjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('app_id', models.CharField(max_length=100, unique=True)),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RegistrationProgress',
+            fields=[
+                ('registration', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress', serialize=False, to='courses.scormcloudregistration')),
+                ('completion', models.CharField(choices=[('UNKNOWN', 'Unknown'), ('COMPLETED', 'Completed'), ('INCOMPLETE', 'Incomplete')], default='UNKNOWN', max_length=20)),
+                ('completion_amount', models.FloatField(blank=True, null=True)),
+                ('success', models.CharField(choices=[('UNKNOWN', 'Unknown'), ('PASSED', 'Passed'), ('FAILED', 'Failed')], default='UNKNOWN', max_length=20)),
+                ('score', models.FloatField(blank=True, null=True)),
+                ('total_seconds_tracked', models.FloatField(default=0)),
+                ('first_access_date', models.DateTimeField(blank=True, null=True)),
+                ('last_access_date', models.DateTimeField(blank=True, null=True)),
+                ('completed_date', models.DateTimeField(blank=True, null=True)),
+                ('updated', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['completion', 'completed_date'], name='courses_reg_complet_d5b09e_idx'), models.Index(fields=['success'], name='courses_reg_success_a21707_idx'), models.Index(fields=['-score'], name='courses_reg_score_7707c8_idx'), models.Index(fields=['-last_access_date'], name='courses_reg_last_ac_f7807a_idx')],
+            },
+        ),
+    ]
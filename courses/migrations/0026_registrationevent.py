@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0025_registrationprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registration_id', models.UUIDField(db_index=True)),
+                ('payload', models.JSONField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0027_courseupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scormcloudcourse',
+            name='package_file_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scormcloudcourse',
+            name='package_resource_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scormcloudcourse',
+            name='package_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scormcloudcourse',
+            name='package_type',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0028_scormcloudcourse_package_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseimportjob',
+            name='package_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='scormcloudcourse',
+            name='package_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
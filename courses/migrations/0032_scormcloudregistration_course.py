@@ -0,0 +1,74 @@
+import logging
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+
+def remove_orphans_and_duplicates(apps, schema_editor):
+    """
+    Drops registrations the foreign key and unique constraint would reject: those for
+    courses that no longer exist locally, and all but one registration per learner and course.
+    The registration that already has synced progress is kept, otherwise the oldest.
+
+    Each removed id is logged as a warning. The registrations may still exist on ScormCloud,
+    where reconcile_registrations reports them as remote_only drift.
+    """
+    ScormCloudCourse = apps.get_model('courses', 'ScormCloudCourse')
+    ScormCloudRegistration = apps.get_model('courses', 'ScormCloudRegistration')
+
+    orphans = ScormCloudRegistration.objects.filter(
+        models.Q(course_id__isnull=True) | ~models.Q(course_id__in=ScormCloudCourse.objects.values('course_id'))
+    )
+    removed = [(registration_id, 'orphaned') for registration_id in orphans.values_list('pk', flat=True)]
+    orphans.delete()
+
+    duplicates = (
+        ScormCloudRegistration.objects.values('learner_id', 'course_id')
+        .annotate(count=Count('pk'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        registrations = sorted(
+            ScormCloudRegistration.objects.filter(learner_id=duplicate['learner_id'], course_id=duplicate['course_id']),
+            key=lambda registration: (not hasattr(registration, 'progress'), registration.created_at),
+        )
+        removed += [(registration.pk, f"duplicate of {registrations[0].pk}") for registration in registrations[1:]]
+        ScormCloudRegistration.objects.filter(pk__in=[registration.pk for registration in registrations[1:]]).delete()
+
+    for registration_id, reason in removed:
+        logger.warning(f"Removed registration {registration_id} ({reason}) before adding its course foreign key.")
+
+    # The deletes queue deferred foreign key checks (from RegistrationProgress), and PostgreSQL
+    # refuses to ALTER a table with pending trigger events; fire them now
+    if removed and schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_alter_user_timezone'),
+        ('courses', '0031_course_deletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_orphans_and_duplicates, migrations.RunPython.noop),
+        # Renaming first turns the existing column into the foreign key, so no data is copied
+        migrations.RenameField(
+            model_name='scormcloudregistration',
+            old_name='course_id',
+            new_name='course',
+        ),
+        migrations.AlterField(
+            model_name='scormcloudregistration',
+            name='course',
+            field=models.ForeignKey(db_column='course_id', on_delete=django.db.models.deletion.CASCADE, related_name='registrations', to='courses.scormcloudcourse', to_field='course_id'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='scormcloudregistration',
+            unique_together={('learner', 'course')},
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0032_scormcloudregistration_course'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registration_id', models.UUIDField(unique=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_run_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0033_registrationrefresh'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScormCloudOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation', models.CharField(choices=[('create_registration', 'Create registration')], max_length=50)),
+                ('registration_id', models.UUIDField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('COMPLETE', 'Complete'), ('ERROR', 'Error')], default='PENDING', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('message', models.TextField(blank=True, null=True)),
+                ('next_run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_run_at'], name='courses_sco_status_971c57_idx')],
+                'unique_together': {('operation', 'registration_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:00
+
+import courses.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0034_scormcloudoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('next_value', models.BigIntegerField(default=0)),
+                ('key', models.CharField(default=courses.models._sequence_key, max_length=64)),
+            ],
+        ),
+    ]
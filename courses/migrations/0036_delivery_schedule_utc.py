@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_schedule(apps, schema_editor):
+    from courses.models import schedule_datetime
+
+    CourseDelivery = apps.get_model('courses', 'CourseDelivery')
+    fields = {
+        'starts_at': ('start_date', 'start_time'),
+        'ends_at': ('end_date', 'end_time'),
+        'deactivates_at': ('deactivation_date', 'deactivation_time'),
+    }
+    batch = []
+    for delivery in CourseDelivery.objects.order_by('pk').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        for field, (date_field, time_field) in fields.items():
+            setattr(delivery, field, schedule_datetime(getattr(delivery, date_field), getattr(delivery, time_field), delivery.timezone))
+        batch.append(delivery)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            CourseDelivery.objects.bulk_update(batch, list(fields))
+            batch = []
+    CourseDelivery.objects.bulk_update(batch, list(fields))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0035_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursedelivery',
+            name='deactivates_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='coursedelivery',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='coursedelivery',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
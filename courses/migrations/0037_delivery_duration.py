@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_duration(apps, schema_editor):
+    from courses.models import duration_parts
+
+    CourseDelivery = apps.get_model('courses', 'CourseDelivery')
+    batch = []
+    for delivery in CourseDelivery.objects.order_by('pk').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        delivery.duration_seconds, delivery.duration_months = duration_parts(
+            delivery.start_date, delivery.start_time, delivery.end_date, delivery.end_time,
+        )
+        batch.append(delivery)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            CourseDelivery.objects.bulk_update(batch, ['duration_seconds', 'duration_months'])
+            batch = []
+    CourseDelivery.objects.bulk_update(batch, ['duration_seconds', 'duration_months'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0036_delivery_schedule_utc'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursedelivery',
+            name='duration_months',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='coursedelivery',
+            name='duration_seconds',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_duration, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0037_delivery_duration'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='courseupload',
+            name='import_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='courses.courseimportjob'),
+        ),
+    ]
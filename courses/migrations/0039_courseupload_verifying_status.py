@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0038_courseupload_import_job_fk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='courseupload',
+            name='status',
+            field=models.CharField(choices=[('UPLOADING', 'Uploading'), ('VERIFYING', 'Verifying'), ('COMPLETE', 'Complete')], default='UPLOADING', max_length=20),
+        ),
+    ]
@@ -1,18 +1,36 @@
+import os
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 import uuid
 from django.contrib.auth import get_user_model
 from datetime import datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
 import dateutil.relativedelta
 
-import random
-import string
+import secrets
 
 
 from accounts.models import Learner, Facilitator
 
 User = get_user_model()
 
+# Distinct (seconds, months) durations whose formatted text is kept in memory
+DURATION_FORMAT_CACHE_SIZE = 1024
+
+
+def _sequence_key():
+    return secrets.token_hex(32)
+
+
+class ScormCloudCourseManager(models.Manager):
+    # Courses tombstoned for deletion are hidden until the deletion job removes them
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class ScormCloudCourse(models.Model):
     course_id = models.CharField(max_length=50, unique=True)  
     title = models.CharField(max_length=255)
@@ -29,6 +47,18 @@ class ScormCloudCourse(models.Model):
     published_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, related_name='published_courses',
     null=True, blank=True)   
     registration_id = models.CharField(max_length=255, null=True, blank=True) 
+    # Package stats recorded by courses.packages when the course was uploaded
+    package_type = models.CharField(max_length=20, null=True, blank=True)
+    package_resource_count = models.PositiveIntegerField(null=True, blank=True)
+    package_file_count = models.PositiveIntegerField(null=True, blank=True)
+    package_size = models.BigIntegerField(null=True, blank=True)
+    # SHA-256 of the imported package; identical re-uploads link to this course instead of re-importing
+    package_sha256 = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # Set when deletion is requested; a CourseDeletionJob removes the course in the background
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ScormCloudCourseManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return f"Course: {self.title} (ID: {self.course_id})"
@@ -36,12 +66,272 @@ class ScormCloudCourse(models.Model):
 class ScormCloudRegistration(models.Model):
     registration_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)  
     learner = models.ForeignKey(Learner, on_delete=models.CASCADE)
-    course_id = models.CharField(max_length=255, null=True, blank=True)
+    # Keyed on the ScormCloud course id, so ``course_id`` still holds e.g. "COURSE-0001"
+    course = models.ForeignKey(ScormCloudCourse, on_delete=models.CASCADE, to_field='course_id', db_column='course_id',
+                               related_name='registrations')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        unique_together = ('learner', 'course')
+
     def __str__(self):
         return f"Registration {self.registration_id} for {self.learner}"
-    
+
+
+class RegistrationProgress(models.Model):
+    COMPLETION = (
+        ('UNKNOWN', 'Unknown'),
+        ('COMPLETED', 'Completed'),
+        ('INCOMPLETE', 'Incomplete'),
+    )
+    SUCCESS = (
+        ('UNKNOWN', 'Unknown'),
+        ('PASSED', 'Passed'),
+        ('FAILED', 'Failed'),
+    )
+
+    # Local copy of ScormCloud registration progress, kept current by courses.progress
+    registration = models.OneToOneField(ScormCloudRegistration, on_delete=models.CASCADE, primary_key=True, related_name='progress')
+    completion = models.CharField(max_length=20, choices=COMPLETION, default='UNKNOWN')
+    completion_amount = models.FloatField(null=True, blank=True)
+    success = models.CharField(max_length=20, choices=SUCCESS, default='UNKNOWN')
+    score = models.FloatField(null=True, blank=True)
+    total_seconds_tracked = models.FloatField(default=0)
+    first_access_date = models.DateTimeField(null=True, blank=True)
+    last_access_date = models.DateTimeField(null=True, blank=True)
+    completed_date = models.DateTimeField(null=True, blank=True)
+    updated = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['completion', 'completed_date']),
+            models.Index(fields=['success']),
+            models.Index(fields=['-score']),
+            models.Index(fields=['-last_access_date']),
+        ]
+
+    def __str__(self):
+        return f"Progress for {self.registration_id}: {self.completion}/{self.success}"
+
+
+class RegistrationSyncState(models.Model):
+    # High-water mark of the incremental progress sync, one row per ScormCloud app
+    app_id = models.CharField(max_length=100, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Registration sync for {self.app_id} up to {self.high_water_mark}"
+
+
+class RegistrationEvent(models.Model):
+    # ScormCloud postbacks waiting to be applied by the course job worker
+    registration_id = models.UUIDField(db_index=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Event for registration {self.registration_id} at {self.received_at}"
+
+
+class ScormCloudOutbox(models.Model):
+    OPERATIONS = (
+        ('create_registration', 'Create registration'),
+    )
+    STATUS = (
+        ('PENDING', 'Pending'),
+        ('COMPLETE', 'Complete'),
+        ('ERROR', 'Error'),
+    )
+
+    # ScormCloud writes recorded in the same transaction as the local change they mirror and
+    # delivered by the course job worker; the registration id doubles as the idempotency key
+    operation = models.CharField(max_length=50, choices=OPERATIONS)
+    registration_id = models.UUIDField()
+    status = models.CharField(max_length=20, choices=STATUS, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    message = models.TextField(null=True, blank=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('operation', 'registration_id')
+        indexes = [
+            models.Index(fields=['status', 'next_run_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.operation} for {self.registration_id} ({self.status})"
+
+
+class RegistrationRefresh(models.Model):
+    # Registrations whose progress the course job worker should re-read from ScormCloud;
+    # one row per registration, so repeated requests before it runs are coalesced
+    registration_id = models.UUIDField(unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_run_at = models.DateTimeField(default=timezone.now, db_index=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Refresh of registration {self.registration_id} due {self.next_run_at}"
+
+
+class CourseImportJob(models.Model):
+    STATUS = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETE', 'Complete'),
+        ('ERROR', 'Error'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    course_id = models.CharField(max_length=50)
+    package = models.FileField(upload_to='course_packages/', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default='PENDING')
+    scorm_job_id = models.CharField(max_length=255, null=True, blank=True)
+    message = models.TextField(null=True, blank=True)
+    # Extra ScormCloudCourse fields applied once the import completes
+    course_fields = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    cover_image = models.ImageField(upload_to='course_covers/', null=True, blank=True)
+    package_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_poll_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='course_import_jobs', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_poll_at']),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in ('COMPLETE', 'ERROR')
+
+    def __str__(self):
+        return f"Import job {self.id} for {self.course_id} ({self.status})"
+
+
+class CourseUpload(models.Model):
+    # A resumable, chunked course package upload, assembled on disk before it is queued for import
+    STATUS = (
+        ('UPLOADING', 'Uploading'),
+        ('VERIFYING', 'Verifying'),
+        ('COMPLETE', 'Complete'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    # Contiguous bytes received from the start of the file; the next chunk must start at or before this
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default='UPLOADING')
+    # Several uploads of the same package share the import job they were deduplicated onto
+    import_job = models.ForeignKey(CourseImportJob, on_delete=models.SET_NULL, related_name='uploads', null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='course_uploads', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    @property
+    def path(self):
+        return os.path.join(settings.COURSE_UPLOAD_DIR, f"{self.id}.part")
+
+    def __str__(self):
+        return f"Upload {self.id} of {self.filename} ({self.received}/{self.size} bytes)"
+
+
+class ScormCloudAppConfiguration(models.Model):
+    # Last application configuration pushed to each ScormCloud app (one row per tenant)
+    app_id = models.CharField(max_length=100, unique=True)
+    settings_hash = models.CharField(max_length=64)
+    applied_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ScormCloud configuration for {self.app_id} ({self.settings_hash[:12]})"
+
+
+class Sequence(models.Model):
+    # Named counters that courses.sequences hands out in blocks; ``key`` seeds the scramble of
+    # codes drawn from the sequence and must never change once values have been issued
+    name = models.CharField(max_length=100, unique=True)
+    next_value = models.BigIntegerField(default=0)
+    key = models.CharField(max_length=64, default=_sequence_key)
+
+    def __str__(self):
+        return f"Sequence {self.name} at {self.next_value}"
+
+
+def schedule_datetime(date, time, tz_name):
+    """Combines a delivery's local date and time in ``tz_name`` into an aware UTC datetime."""
+    if not date or not time:
+        return None
+    local = datetime.combine(date, time).replace(tzinfo=ZoneInfo(tz_name or 'UTC'))
+    return local.astimezone(ZoneInfo('UTC'))
+
+
+def duration_parts(start_date, start_time, end_date, end_time):
+    """Returns (seconds, calendar months) between a delivery's start and end, or (None, None)."""
+    if not start_date or not end_date or not start_time or not end_time:
+        return None, None
+    start_datetime = datetime.combine(start_date, start_time)
+    end_datetime = datetime.combine(end_date, end_time)
+    diff = dateutil.relativedelta.relativedelta(end_datetime, start_datetime)
+    return int((end_datetime - start_datetime).total_seconds()), max(diff.years * 12 + diff.months, 0)
+
+
+@lru_cache(maxsize=DURATION_FORMAT_CACHE_SIZE)
+def format_duration(seconds, months):
+    if seconds is None:
+        return "Not available"
+
+    delta = timedelta(seconds=seconds)
+    if delta < timedelta(days=1):
+        hours = delta.seconds // 3600
+        return f"{hours} Hours" if hours != 1 else "1 Hour"
+
+    if delta < timedelta(weeks=1):
+        days = delta.days
+        return f"{days} Days" if days != 1 else "1 Day"
+
+    # Longer durations show calendar years and months, then the total length in weeks and days
+    years, months = divmod(months or 0, 12)
+    weeks, days = divmod(delta.days, 7)
+
+    readable = []
+    if years:
+        readable.append(f"{years} Years" if years != 1 else "1 Year")
+    if months:
+        readable.append(f"{months} Months" if months != 1 else "1 Month")
+    if weeks:
+        readable.append(f"{weeks} Weeks" if weeks != 1 else "1 Week")
+    if days:
+        readable.append(f"{days} Days" if days != 1 else "1 Day")
+
+    return ", ".join(readable)
+
+
+class CourseDeliveryQuerySet(models.QuerySet):
+    def active(self, at=None):
+        """Deliveries that have started, not ended and not been deactivated at ``at`` (default now)."""
+        at = at or timezone.now()
+        return self.filter(
+            models.Q(starts_at__isnull=True) | models.Q(starts_at__lte=at),
+            models.Q(ends_at__isnull=True) | models.Q(ends_at__gt=at),
+            models.Q(deactivates_at__isnull=True) | models.Q(deactivates_at__gt=at),
+        )
+
+    def starting_between(self, start, end):
+        return self.filter(starts_at__gte=start, starts_at__lt=end)
+
 
 class CourseDelivery(models.Model):
     DELIVERY_TYPES = (
@@ -72,6 +362,14 @@ class CourseDelivery(models.Model):
     deactivation_date = models.DateField(null=True, blank=True)
     deactivation_time = models.TimeField(null=True, blank=True)
     timezone = models.CharField(max_length=50, default='UTC')
+    # The dates and times above in UTC, kept in sync on save so schedules can be filtered and ordered in SQL
+    starts_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    ends_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    deactivates_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    # Length of the delivery in the creator's wall-clock time, as whole seconds and whole calendar
+    # months, computed on save and formatted by format_duration
+    duration_seconds = models.BigIntegerField(null=True, blank=True, editable=False)
+    duration_months = models.PositiveIntegerField(null=True, blank=True, editable=False)
     is_mandatory = models.BooleanField(default=False)
     requires_attendance = models.BooleanField(default=False)
     requires_feedback = models.BooleanField(default=False)
@@ -80,52 +378,129 @@ class CourseDelivery(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='created_deliveries', null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS, default='ACTIVE')
 
+    objects = CourseDeliveryQuerySet.as_manager()
+
+    SCHEDULE_FIELDS = {
+        'starts_at': ('start_date', 'start_time'),
+        'ends_at': ('end_date', 'end_time'),
+        'deactivates_at': ('deactivation_date', 'deactivation_time'),
+    }
+
+    def sync_schedule(self):
+        for field, (date_field, time_field) in self.SCHEDULE_FIELDS.items():
+            setattr(self, field, schedule_datetime(getattr(self, date_field), getattr(self, time_field), self.timezone))
+
+    def save(self, *args, **kwargs):
+        self.sync_schedule()
+        self.sync_duration()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.SCHEDULE_FIELDS) | {'duration_seconds', 'duration_months'}
+        super().save(*args, **kwargs)
+
     @classmethod
     def generate_unique_delivery_code(cls):
-        while True:
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            if not cls.objects.filter(delivery_code=code).exists():
-                return code
-            
+        from .sequences import next_delivery_code
+
+        return next_delivery_code()
+
+    def sync_duration(self):
+        self.duration_seconds, self.duration_months = duration_parts(self.start_date, self.start_time, self.end_date, self.end_time)
+
     def duration(self):
-        if not self.start_date or not self.end_date or not self.start_time or not self.end_time:
-            return "Not available"
+        return format_duration(self.duration_seconds, self.duration_months)
+
+    def __str__(self):
+        return f"Course Delivery: (Code: {self.delivery_code})"
+    
+
+class BulkEnrollmentJob(models.Model):
+    STATUS = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETE', 'Complete'),
+        ('ERROR', 'Error'),
+    )
+
+    delivery = models.ForeignKey(CourseDelivery, on_delete=models.CASCADE, related_name='enrollment_jobs')
+    status = models.CharField(max_length=20, choices=STATUS, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    registered = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    message = models.TextField(null=True, blank=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='enrollment_jobs', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_run_at']),
+        ]
+
+    def __str__(self):
+        return f"Enrollment job {self.pk} for {self.delivery.delivery_code} ({self.status})"
 
-        start_datetime = datetime.combine(self.start_date, self.start_time)
-        end_datetime = datetime.combine(self.end_date, self.end_time)
-        delta = end_datetime - start_datetime
 
-        if delta < timedelta(days=1):
-            hours = delta.seconds // 3600
-            return f"{hours} Hours" if hours != 1 else "1 Hour"
+class CourseBatchImport(models.Model):
+    STATUS = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETE', 'Complete'),
+        ('ERROR', 'Error'),
+    )
 
-        if delta < timedelta(weeks=1):
-            days = delta.days
-            return f"{days} Days" if days != 1 else "1 Day"
+    # An outer archive of course packages imported by the course job worker
+    archive = models.FileField(upload_to='course_batches/', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default='PENDING')
+    course_fields = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    # Per-package results, written once the batch finishes
+    report = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    message = models.TextField(null=True, blank=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='course_batch_imports', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-        # For durations longer than a week, use dateutil's relativedelta
-        diff = dateutil.relativedelta.relativedelta(end_datetime, start_datetime)
-        years, months, weeks, days = diff.years, diff.months, diff.weeks, diff.days
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_run_at']),
+        ]
 
-        # Adjust days to be the remainder after accounting for full weeks
-        total_days = (end_datetime - start_datetime).days
-        weeks, days = divmod(total_days, 7)
+    def __str__(self):
+        return f"Batch import {self.pk} ({self.status})"
 
-        readable = []
-        if years:
-            readable.append(f"{years} Years" if years != 1 else "1 Year")
-        if months:
-            readable.append(f"{months} Months" if months != 1 else "1 Month")
-        if weeks:
-            readable.append(f"{weeks} Weeks" if weeks != 1 else "1 Week")
-        if days:
-            readable.append(f"{days} Days" if days != 1 else "1 Day")
 
-        return ", ".join(readable)
+class CourseDeletionJob(models.Model):
+    STATUS = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETE', 'Complete'),
+        ('ERROR', 'Error'),
+    )
+
+    course_id = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS, default='PENDING')
+    remote_deleted = models.BooleanField(default=False)
+    registrations_deleted = models.PositiveIntegerField(default=0)
+    deliveries_deleted = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    message = models.TextField(null=True, blank=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='course_deletion_jobs', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_run_at']),
+        ]
 
     def __str__(self):
-        return f"Course Delivery: (Code: {self.delivery_code})"
-    
+        return f"Deletion job {self.pk} for {self.course_id} ({self.status})"
+
 
 class Enrollment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
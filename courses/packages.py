@@ -0,0 +1,126 @@
+import hashlib
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+# Uncompressed size above which a package is rejected outright (bytes)
+MAX_UNCOMPRESSED_SIZE = 4 * 1024 ** 3
+# Overall uncompressed/compressed ratio above which a package is treated as a zip bomb
+MAX_COMPRESSION_RATIO = 100
+# Largest manifest that will be parsed (bytes)
+MAX_MANIFEST_SIZE = 10 * 1024 ** 2
+
+# Manifest at the package root that identifies each package type, and the element counted as a resource
+MANIFESTS = (
+    ('imsmanifest.xml', 'resource'),
+    ('cmi5.xml', 'au'),
+    ('tincan.xml', 'activity'),
+)
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _scorm_version(schema_version):
+    schema_version = (schema_version or '').strip()
+    if schema_version == '1.2':
+        return 'SCORM12'
+    if '2004' in schema_version or schema_version == 'CAM 1.3':
+        return 'SCORM2004'
+    return 'SCORM'
+
+
+def _scan_manifest(archive, info, resource_tag):
+    """Streams the manifest once, counting resources and picking up the SCORM schema version."""
+    resources = 0
+    schema_version = None
+    try:
+        with archive.open(info) as manifest:
+            for _, element in ElementTree.iterparse(manifest):
+                name = _local_name(element.tag)
+                if name == resource_tag:
+                    resources += 1
+                elif name == 'schemaversion' and schema_version is None:
+                    schema_version = element.text
+                element.clear()
+    except ElementTree.ParseError as e:
+        raise ValueError(f"{info.filename} is not valid XML: {e}")
+    except (zipfile.BadZipFile, NotImplementedError) as e:
+        raise ValueError(f"{info.filename} could not be read: {e}")
+    return resources, schema_version
+
+
+def inspect_package(package):
+    """
+    Validates a course package and returns its stats as ScormCloudCourse field values.
+
+    Only the zip central directory and the package manifest are read; nothing is extracted.
+    ``package`` is a path or a seekable file, which is rewound afterwards. Raises ValueError
+    for anything ScormCloud would reject.
+    """
+    try:
+        archive = zipfile.ZipFile(package)
+    except zipfile.BadZipFile:
+        raise ValueError('Course package is not a valid zip file')
+
+    with archive:
+        entries = [info for info in archive.infolist() if not info.is_dir()]
+        if not entries:
+            raise ValueError('Course package is empty')
+
+        for info in entries:
+            name = posixpath.normpath(info.filename)
+            if name.startswith(('/', '../')) or name == '..':
+                raise ValueError(f"Course package contains an unsafe path: {info.filename}")
+            if info.flag_bits & 0x1:
+                raise ValueError('Course package contains encrypted files')
+
+        uncompressed = sum(info.file_size for info in entries)
+        compressed = sum(info.compress_size for info in entries)
+        if uncompressed > MAX_UNCOMPRESSED_SIZE:
+            raise ValueError(f"Course package expands to {uncompressed} bytes, more than the {MAX_UNCOMPRESSED_SIZE} allowed")
+        if compressed and uncompressed / compressed > MAX_COMPRESSION_RATIO:
+            raise ValueError('Course package compression ratio is implausibly high')
+
+        root_files = {info.filename: info for info in entries if '/' not in info.filename}
+        manifest = next(((root_files[name], tag) for name, tag in MANIFESTS if name in root_files), None)
+        aicc_units = [name for name in root_files if name.lower().endswith('.au')]
+
+        if manifest is not None:
+            info, resource_tag = manifest
+            if info.file_size > MAX_MANIFEST_SIZE:
+                raise ValueError(f"{info.filename} is larger than {MAX_MANIFEST_SIZE} bytes")
+            resources, schema_version = _scan_manifest(archive, info, resource_tag)
+            if not resources:
+                raise ValueError(f"{info.filename} declares no {resource_tag} elements")
+            if info.filename == 'imsmanifest.xml':
+                package_type = _scorm_version(schema_version)
+            else:
+                package_type = 'CMI5' if info.filename == 'cmi5.xml' else 'XAPI'
+        elif aicc_units:
+            package_type = 'AICC'
+            resources = len(aicc_units)
+        else:
+            raise ValueError('No imsmanifest.xml, cmi5.xml or tincan.xml found at the package root')
+
+    if hasattr(package, 'seek'):
+        package.seek(0)
+
+    return {
+        'package_type': package_type,
+        'package_resource_count': resources,
+        'package_file_count': len(entries),
+        'package_size': uncompressed,
+    }
+
+
+def package_digest(package):
+    """SHA-256 of a package, preferring the digest computed while it was uploaded."""
+    if getattr(package, 'sha256', None):
+        return package.sha256
+    digest = hashlib.sha256()
+    for chunk in package.chunks():
+        digest.update(chunk)
+    package.seek(0)
+    return digest.hexdigest()
@@ -0,0 +1,214 @@
+import json
+import logging
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+import rustici_software_cloud_v2 as scorm_cloud
+
+from . import clients
+from .models import Enrollment, RegistrationProgress, RegistrationRefresh, RegistrationSyncState, ScormCloudRegistration
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FIELDS = [
+    'completion', 'completion_amount', 'success', 'score', 'total_seconds_tracked',
+    'first_access_date', 'last_access_date', 'completed_date', 'updated',
+]
+# Seconds before registrations a learner has never had synced are looked up on ScormCloud again
+REMOTE_PROGRESS_RETRY = 60
+# Refresh requests for a registration within this window are served by a single ScormCloud read
+REFRESH_DEBOUNCE = timedelta(seconds=2)
+# ScormCloud timestamps have millisecond precision and its ``since`` filter is inclusive, so the
+# next sync starts this far past the high-water mark to skip the record it already has
+SINCE_RESOLUTION = timedelta(milliseconds=1)
+
+
+def progress_from_schema(registration):
+    """Maps a ScormCloud RegistrationSchema onto RegistrationProgress field values."""
+    return {
+        'completion': registration.registration_completion or 'UNKNOWN',
+        'completion_amount': registration.registration_completion_amount,
+        'success': registration.registration_success or 'UNKNOWN',
+        'score': registration.score.scaled if registration.score else None,
+        'total_seconds_tracked': registration.total_seconds_tracked or 0,
+        'first_access_date': registration.first_access_date,
+        'last_access_date': registration.last_access_date,
+        'completed_date': registration.completed_date,
+        'updated': registration.updated,
+    }
+
+
+def registration_from_payload(payload):
+    """Deserializes a registration JSON document (e.g. a postback body) into a RegistrationSchema."""
+    response = SimpleNamespace(data=json.dumps(payload))
+    return clients.get_api_client().deserialize(response, 'RegistrationSchema')
+
+
+def upsert_progress(registrations):
+    """
+    Upserts progress for the given RegistrationSchema objects in one statement.
+
+    Registrations unknown to the local database are skipped. Enrollments in deliveries of
+    newly completed courses are flagged as completed. Returns the number saved.
+    """
+    by_id = {}
+    for registration in registrations:
+        try:
+            by_id[uuid.UUID(registration.id)] = registration
+        except (TypeError, ValueError):
+            # Created in the ScormCloud console or by another integration; never one of ours
+            continue
+    known = ScormCloudRegistration.objects.filter(pk__in=by_id.keys()).values_list('pk', 'learner__user_id', 'course_id')
+    rows = []
+    completions = []
+    for registration_id, user_id, course_id in known:
+        progress = progress_from_schema(by_id[registration_id])
+        rows.append(RegistrationProgress(registration_id=registration_id, **progress))
+        if progress['completion'] == 'COMPLETED':
+            completions.append((user_id, course_id, progress['completed_date'] or timezone.now()))
+
+    RegistrationProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['registration'],
+        update_fields=PROGRESS_FIELDS + ['synced_at'],
+    )
+    if completions:
+        _complete_enrollments(completions)
+    return len(rows)
+
+
+def _remote_progress_key(learner_id):
+    return f"remote_progress_lookup:{learner_id}"
+
+
+def _local_progress(registration_ids):
+    rows = RegistrationProgress.objects.filter(registration_id__in=registration_ids).values(
+        'registration__course_id', *PROGRESS_FIELDS
+    )
+    return {row.pop('registration__course_id'): row for row in rows}
+
+
+def learner_progress(learner):
+    """
+    Returns ``{course_id: progress}`` for every registration of ``learner``, with progress
+    as a dict of RegistrationProgress fields.
+
+    Progress is always read from the locally synced copy, so updates written by any process
+    show up at once. Registrations never synced are fetched with a single paged ScormCloud
+    listing filtered to the learner and stored locally; that lookup is made at most once per
+    REMOTE_PROGRESS_RETRY per process. Courses without any progress yet are absent from the result.
+    """
+    registrations = dict(ScormCloudRegistration.objects.filter(learner=learner).values_list('pk', 'course_id'))
+    progress = _local_progress(registrations)
+    missing = [registration_id for registration_id, course_id in registrations.items() if course_id not in progress]
+    # The cache only throttles ScormCloud lookups; it never holds progress, so it needn't be shared
+    if not missing or not cache.add(_remote_progress_key(learner.pk), True, REMOTE_PROGRESS_RETRY):
+        return progress
+
+    try:
+        registration_api = clients.registration_api()
+        response = registration_api.get_registrations(learner_id=str(learner.user_id))
+        fetched = list(response.registrations or [])
+        while response.more:
+            response = registration_api.get_registrations(more=response.more)
+            fetched.extend(response.registrations or [])
+    except scorm_cloud.rest.ApiException as e:
+        # Serve what is known locally and let the next read retry
+        logger.warning(f"Could not fetch progress for learner {learner.pk} from ScormCloud: {e.reason}")
+        cache.delete(_remote_progress_key(learner.pk))
+        return progress
+    missing_ids = {str(registration_id) for registration_id in missing}
+    if upsert_progress([registration for registration in fetched if registration.id in missing_ids]):
+        progress.update(_local_progress(missing))
+    return progress
+
+def _complete_enrollments(completions):
+    condition = Q()
+    for user_id, course_id, _ in completions:
+        condition |= Q(user_id=user_id, course_delivery__course__course_id=course_id)
+    completed_dates = {(user_id, course_id): completed_date for user_id, course_id, completed_date in completions}
+
+    enrollments = list(
+        Enrollment.objects.filter(condition, is_completed=False)
+        .select_related('course_delivery__course')
+    )
+    for enrollment in enrollments:
+        enrollment.is_completed = True
+        enrollment.completion_date = completed_dates[(enrollment.user_id, enrollment.course_delivery.course.course_id)]
+    Enrollment.objects.bulk_update(enrollments, ['is_completed', 'completion_date'])
+
+
+def refresh_registration_progress(registration_id):
+    """
+    Queues a debounced refresh of one registration's progress and, unless a refresh of it was
+    already pending, also re-reads it from ScormCloud right away. Repeated calls within the
+    debounce window cost at most one inline ScormCloud call; the queued refresh still picks
+    up anything ScormCloud records after this read. Returns whether the progress was
+    refreshed now.
+    """
+    if not request_registration_refresh(registration_id):
+        return False
+    try:
+        registration = clients.registration_api().get_registration_progress(str(registration_id))
+    except scorm_cloud.rest.ApiException as e:
+        logger.warning(f"Could not refresh registration {registration_id}; leaving it to the background refresh: {e.reason}")
+        return False
+    upsert_progress([registration])
+    return True
+
+
+def request_registration_refresh(registration_id):
+    """
+    Queues a re-read of one registration's progress from ScormCloud.
+
+    Returns False if a refresh of that registration is already pending, in which case the
+    request is folded into it.
+    """
+    _, created = RegistrationRefresh.objects.get_or_create(
+        registration_id=registration_id,
+        defaults={'next_run_at': timezone.now() + REFRESH_DEBOUNCE},
+    )
+    return created
+
+
+def sync_registration_progress(tenant=None, full=False):
+    """
+    Pulls registrations changed since the last high-water mark and upserts their progress.
+
+    Pages are followed with ScormCloud's ``more`` token and the high-water mark is saved after
+    every page, so an interrupted sync resumes close to where it stopped.
+    """
+    app_id, _ = clients.get_credentials(tenant)
+    state, _ = RegistrationSyncState.objects.get_or_create(app_id=app_id)
+    registration_api = clients.registration_api(tenant)
+
+    started_at = timezone.now()
+    high_water_mark = None if full else state.high_water_mark
+    params = {'datetime_filter': 'updated', 'order_by': 'updated_asc'}
+    if high_water_mark:
+        params['since'] = high_water_mark + SINCE_RESOLUTION
+
+    fetched = saved = 0
+    response = registration_api.get_registrations(**params)
+    while True:
+        registrations = response.registrations or []
+        fetched += len(registrations)
+        saved += upsert_progress(registrations)
+
+        updated = [registration.updated for registration in registrations if registration.updated]
+        if updated:
+            high_water_mark = max([high_water_mark or updated[0]] + updated)
+            RegistrationSyncState.objects.filter(pk=state.pk).update(high_water_mark=high_water_mark)
+
+        if not response.more:
+            break
+        response = registration_api.get_registrations(more=response.more)
+
+    RegistrationSyncState.objects.filter(pk=state.pk).update(last_synced_at=started_at)
+    logger.info(f"Registration progress sync for {app_id}: {fetched} fetched, {saved} saved.")
+    return {'fetched': fetched, 'saved': saved, 'high_water_mark': high_water_mark}
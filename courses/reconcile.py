@@ -0,0 +1,183 @@
+import heapq
+import logging
+import os
+import tempfile
+import uuid
+from itertools import islice
+
+from django.utils import timezone
+
+from accounts.models import Learner
+from . import clients
+from .models import ScormCloudCourse, ScormCloudOutbox, ScormCloudRegistration
+
+logger = logging.getLogger(__name__)
+
+# Remote ids sorted in memory at a time before being spilled to disk as one sorted run
+SORT_RUN_SIZE = 500_000
+# Local rows fetched per round trip while streaming the registration table
+LOCAL_CHUNK_SIZE = 5_000
+# Drift repaired per statement
+REPAIR_BATCH_SIZE = 1_000
+
+REPORT_FIELDS = ['drift', 'registration_id', 'course_id', 'learner_id']
+
+
+def _remote_registrations(registration_api, until):
+    """Yields (registration_id, course_id, learner_id) for every registration ScormCloud lists."""
+    response = registration_api.get_registrations(datetime_filter='created', until=until, order_by='created_asc')
+    while True:
+        for registration in response.registrations or []:
+            yield registration.id.lower(), registration.course.id, registration.learner.id
+        if not response.more:
+            return
+        response = registration_api.get_registrations(more=response.more)
+
+
+def _sorted_by_id(records, workdir, run_size=SORT_RUN_SIZE):
+    """
+    External merge sort of ``records`` by registration id.
+
+    ScormCloud can't list registrations in id order, so the listing is cut into sorted runs
+    of ``run_size`` records spilled to ``workdir`` and merged lazily; at most one run is held
+    in memory.
+    """
+    runs = []
+    records = iter(records)
+    while True:
+        run = sorted(islice(records, run_size))
+        if not run:
+            break
+        path = os.path.join(workdir, f"run-{len(runs):05d}.tsv")
+        with open(path, 'w') as f:
+            f.writelines('\t'.join(record) + '\n' for record in run)
+        runs.append(path)
+        del run
+
+    def read(path):
+        with open(path) as f:
+            for line in f:
+                yield tuple(line.rstrip('\n').split('\t'))
+
+    return heapq.merge(*(read(path) for path in runs))
+
+
+def _local_registrations(until):
+    """Yields (registration_id, course_id, learner_id) for local registrations in id order."""
+    rows = (
+        ScormCloudRegistration.objects.filter(created_at__lte=until)
+        .order_by('registration_id')
+        .values_list('registration_id', 'course_id', 'learner__user_id')
+        .iterator(chunk_size=LOCAL_CHUNK_SIZE)
+    )
+    for registration_id, course_id, user_id in rows:
+        yield str(registration_id), course_id, str(user_id)
+
+
+def merge_diff(local, remote):
+    """
+    Merges two id-sorted record streams in one pass.
+
+    Yields ('local_only', record) and ('remote_only', record) for ids on one side only, and
+    ('matched', record) for ids on both.
+    """
+    local, remote = iter(local), iter(remote)
+    left, right = next(local, None), next(remote, None)
+    previous = ''
+    while left is not None or right is not None:
+        if right is None or (left is not None and left[0] < right[0]):
+            drift, record, left = 'local_only', left, next(local, None)
+        elif left is None or right[0] < left[0]:
+            drift, record, right = 'remote_only', right, next(remote, None)
+        else:
+            drift, record = 'matched', left
+            left, right = next(local, None), next(remote, None)
+        if record[0] < previous:
+            raise RuntimeError(f"Registration ids are not sorted consistently near {record[0]}")
+        previous = record[0]
+        yield drift, record
+
+
+def _requeue_remote_creation(records):
+    """Queues registrations missing on ScormCloud for re-creation through the outbox."""
+    ids = [registration_id for registration_id, _, _ in records]
+    pending = set(
+        str(registration_id) for registration_id in ScormCloudOutbox.objects.filter(
+            operation='create_registration', registration_id__in=ids, status='PENDING',
+        ).values_list('registration_id', flat=True)
+    )
+    missing = [registration_id for registration_id in ids if registration_id not in pending]
+    ScormCloudOutbox.objects.filter(operation='create_registration', registration_id__in=missing).update(
+        status='PENDING', attempts=0, message=None, next_run_at=timezone.now(),
+    )
+    ScormCloudOutbox.objects.bulk_create(
+        [ScormCloudOutbox(operation='create_registration', registration_id=registration_id) for registration_id in missing],
+        ignore_conflicts=True,
+    )
+    return len(missing)
+
+
+def _adopt_remote(records):
+    """Records registrations that exist only on ScormCloud locally, where course and learner are known."""
+    courses = set(
+        ScormCloudCourse.all_objects.filter(course_id__in={course_id for _, course_id, _ in records})
+        .values_list('course_id', flat=True)
+    )
+    learners = dict(
+        Learner.objects.filter(user_id__in={learner_id for _, _, learner_id in records if learner_id.isdigit()})
+        .values_list('user_id', 'pk')
+    )
+    adopted = []
+    for registration_id, course_id, learner_id in records:
+        if course_id not in courses or not learner_id.isdigit() or int(learner_id) not in learners:
+            continue
+        try:
+            registration_id = uuid.UUID(registration_id)
+        except ValueError:
+            # Created outside the LMS with an id it could never have issued
+            continue
+        adopted.append(ScormCloudRegistration(registration_id=registration_id, course_id=course_id, learner_id=learners[int(learner_id)]))
+    # A learner already holding another registration for the course keeps it
+    ScormCloudRegistration.objects.bulk_create(adopted, ignore_conflicts=True)
+    return ScormCloudRegistration.objects.filter(pk__in=[registration.pk for registration in adopted]).count()
+
+
+def reconcile_registrations(tenant=None, repair=False, report=None, run_size=SORT_RUN_SIZE):
+    """
+    Diffs local registrations against ScormCloud's and optionally repairs the drift.
+
+    Both sides are streamed in registration id order and compared in one merge pass, so
+    memory stays constant however many registrations there are. Only registrations created
+    before the run started are compared. With ``repair``, local registrations missing on
+    ScormCloud are queued for re-creation through the outbox and remote-only registrations
+    whose course and learner exist locally are recorded. ``report`` is an optional csv.writer
+    that receives one row per drifted registration. Returns the counts.
+    """
+    started_at = timezone.now()
+    registration_api = clients.registration_api(tenant)
+    counts = {'matched': 0, 'local_only': 0, 'remote_only': 0, 'requeued': 0, 'adopted': 0}
+    batches = {'local_only': [], 'remote_only': []}
+    repairs = {'local_only': ('requeued', _requeue_remote_creation), 'remote_only': ('adopted', _adopt_remote)}
+
+    def flush(drift):
+        if repair and batches[drift]:
+            counter, repair_batch = repairs[drift]
+            counts[counter] += repair_batch(batches[drift])
+        batches[drift].clear()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        remote = _sorted_by_id(_remote_registrations(registration_api, started_at), workdir, run_size)
+        for drift, record in merge_diff(_local_registrations(started_at), remote):
+            counts[drift] += 1
+            if drift == 'matched':
+                continue
+            if report is not None:
+                report.writerow((drift,) + tuple(record))
+            batches[drift].append(record)
+            if len(batches[drift]) >= REPAIR_BATCH_SIZE:
+                flush(drift)
+        flush('local_only')
+        flush('remote_only')
+
+    logger.info(f"Registration reconciliation: {counts}")
+    return counts
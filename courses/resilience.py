@@ -0,0 +1,223 @@
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import urllib3
+from rustici_software_cloud_v2.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+# Seconds to establish a connection; each operation sets its own read timeout below
+CONNECT_TIMEOUT = 5
+# Consecutive failures that open a circuit, and seconds it stays open before a trial call
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30
+# Idempotent calls are retried with full-jitter exponential backoff (seconds)
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 8
+# Seconds a call waits for a free slot in its bulkhead before failing fast
+BULKHEAD_WAIT = 0.5
+# Concurrent ScormCloud calls allowed per operation class in one process
+BULKHEAD_LIMITS = {
+    # Package uploads hold a slot for minutes; batch_import leaves some of these for admin uploads
+    'import': 6,
+    # Import status polls and course deletions are short, and must not queue behind uploads
+    'import_status': 8,
+    'deletion': 2,
+    'launch': 16,
+    'listing': 4,
+    'registration': 16,
+    'admin': 2,
+}
+# Statuses that mean ScormCloud (not the request) is at fault; 0 is a transport-level SDK error
+TRANSIENT_STATUSES = {0, 429, 500, 502, 503, 504}
+
+# bulkhead: operation class, timeout: read timeout in seconds per attempt, retries: extra attempts (idempotent calls only)
+Operation = namedtuple('Operation', 'bulkhead timeout retries')
+
+OPERATIONS = {
+    'create_upload_and_import_course_job': Operation('import', 300, 0),
+    'create_fetch_and_import_course_job': Operation('import', 30, 0),
+    'create_no_upload_and_import_course_job': Operation('import', 30, 0),
+    'get_import_job_status': Operation('import_status', 10, 2),
+    'delete_course': Operation('deletion', 30, 2),
+    'get_course': Operation('listing', 10, 2),
+    'get_courses': Operation('listing', 30, 2),
+    'get_registrations': Operation('listing', 30, 2),
+    # Registration ids are deterministic and services.create_remote_registration handles its own
+    # rate-limit retries and "already exists" recovery, so creation is not retried here
+    'create_registration': Operation('registration', 15, 0),
+    'get_registration': Operation('registration', 10, 2),
+    'get_registration_progress': Operation('registration', 10, 2),
+    'delete_registration': Operation('registration', 15, 2),
+    'build_registration_launch_link': Operation('launch', 10, 2),
+    'get_application_configuration': Operation('admin', 10, 2),
+    'set_application_configuration': Operation('admin', 15, 2),
+}
+DEFAULT_OPERATION = Operation('admin', 30, 0)
+
+
+class ScormCloudUnavailable(ApiException):
+    """Raised when ScormCloud can't be reached, its circuit is open or a bulkhead is full."""
+
+    def __init__(self, reason):
+        super().__init__(status=503, reason=reason)
+
+
+class CircuitBreaker:
+    """
+    Fails ScormCloud calls fast after repeated server-side failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens for ``reset_timeout``
+    seconds, then lets a single trial call through; its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'closed':
+                return
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+        raise ScormCloudUnavailable(f"ScormCloud circuit for {self.name} is open")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"ScormCloud circuit for {self.name} closed.")
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"ScormCloud circuit for {self.name} opened after {self.failures} failures.")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'rejected': self.rejected}
+
+
+class Bulkhead:
+    """Caps concurrent calls of one operation class so it can't take every worker thread."""
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self.rejected = 0
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self):
+        if not self._semaphore.acquire(timeout=BULKHEAD_WAIT):
+            with self._lock:
+                self.rejected += 1
+            raise ScormCloudUnavailable(f"Too many concurrent ScormCloud {self.name} calls")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {'limit': self.limit, 'in_flight': self.in_flight, 'rejected': self.rejected}
+
+
+bulkheads = {name: Bulkhead(name, limit) for name, limit in BULKHEAD_LIMITS.items()}
+
+
+def _retry_delay(error, attempt):
+    retry_after = error.headers.get('Retry-After') if getattr(error, 'headers', None) else None
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), RETRY_BACKOFF_MAX)
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** attempt))
+
+
+def call(breaker, name, func, *args, **kwargs):
+    """Runs one SDK operation under its timeout, bulkhead, retry policy and ``breaker``."""
+    operation = OPERATIONS.get(name, DEFAULT_OPERATION)
+    # The SDK only honours an int or a (connect, read) tuple here
+    kwargs.setdefault('_request_timeout', (CONNECT_TIMEOUT, operation.timeout))
+    bulkhead = bulkheads[operation.bulkhead]
+
+    for attempt in range(operation.retries + 1):
+        with bulkhead.slot():
+            breaker.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except ApiException as e:
+                error = e
+                transient = e.status in TRANSIENT_STATUSES
+                # Throttling and client errors still prove ScormCloud is up
+                server_fault = transient and e.status != 429
+            except urllib3.exceptions.HTTPError as e:
+                error = ScormCloudUnavailable(f"ScormCloud {name} failed: {e}")
+                transient = server_fault = True
+            except BaseException:
+                # Anything else (an undecodable response, an SDK bug) still has to settle the
+                # breaker, or a half-open trial would stay in flight and block every later call
+                breaker.record_failure()
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+        if server_fault:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if not transient or attempt == operation.retries:
+            raise error
+        delay = _retry_delay(error, attempt)
+        logger.warning(f"ScormCloud {name} failed ({error.reason}); retry {attempt + 1} in {delay:.2f}s.")
+        time.sleep(delay)
+
+
+class ResilientApi:
+    """Wraps a generated ScormCloud API object so every operation goes through ``call``."""
+
+    def __init__(self, api, breaker):
+        self._api = api
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if name.startswith('_') or name.endswith('_with_http_info') or not callable(attr):
+            return attr
+
+        def operation(*args, **kwargs):
+            return call(self._breaker, name, attr, *args, **kwargs)
+        return operation
+
+
+def stats():
+    return {name: bulkhead.stats() for name, bulkhead in bulkheads.items()}
@@ -0,0 +1,104 @@
+import hashlib
+import hmac
+import string
+import threading
+
+from django.db import transaction
+
+from .models import Sequence
+
+# Delivery codes are DELIVERY_CODE_LENGTH characters of DELIVERY_CODE_ALPHABET. Codes issued
+# before the allocator existed are 6 random characters, so 7 keeps the two sets disjoint.
+DELIVERY_CODE_ALPHABET = string.ascii_uppercase + string.digits
+DELIVERY_CODE_LENGTH = 7
+# Values each process leases from a sequence per database round trip
+DELIVERY_CODE_BLOCK_SIZE = 100
+# Feistel rounds used to scramble sequence values into codes
+SCRAMBLE_ROUNDS = 4
+
+
+class BlockAllocator:
+    """
+    Hands out values of named Sequences from blocks leased per process.
+
+    Each lease reserves ``block_size`` consecutive values with one locked UPDATE, so only one
+    call in ``block_size`` touches the database. Values left in a block when the process
+    exits are skipped, never reissued.
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def lease(name, count, start=0):
+        """
+        Reserves ``count`` values of sequence ``name`` and returns them with the sequence key.
+
+        ``start`` (a value, or a callable evaluated only then) is where a new sequence begins.
+        """
+        with transaction.atomic():
+            sequence, _ = Sequence.objects.select_for_update().get_or_create(name=name, defaults={'next_value': start})
+            first = sequence.next_value
+            sequence.next_value = first + count
+            sequence.save(update_fields=['next_value'])
+        return range(first, first + count), sequence.key
+
+    def next(self, name, block_size):
+        """Returns the next value of sequence ``name`` and the sequence key."""
+        with self._lock:
+            block = self._blocks.get(name)
+            value = next(block[0], None) if block else None
+            if value is None:
+                values, key = self.lease(name, block_size)
+                block = self._blocks[name] = (iter(values), key)
+                value = next(block[0])
+            return value, block[1]
+
+
+allocator = BlockAllocator()
+
+
+def _round(key, round_number, value, bits):
+    digest = hmac.new(key.encode(), f"{round_number}:{value}".encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:8], 'big') & ((1 << bits) - 1)
+
+
+def scramble(value, key, domain):
+    """
+    Maps ``value`` in [0, domain) to a unique, unpredictable value in the same range.
+
+    A keyed Feistel network is a permutation of its bit space, and cycle-walking until the
+    result falls back inside ``domain`` keeps it a permutation of [0, domain).
+    """
+    half = ((domain - 1).bit_length() + 1) // 2
+    mask = (1 << half) - 1
+    while True:
+        left, right = value >> half, value & mask
+        for round_number in range(SCRAMBLE_ROUNDS):
+            left, right = right, left ^ _round(key, round_number, right, half)
+        value = (left << half) | right
+        if value < domain:
+            return value
+
+
+def encode(value, alphabet=DELIVERY_CODE_ALPHABET, length=DELIVERY_CODE_LENGTH):
+    characters = []
+    for _ in range(length):
+        value, index = divmod(value, len(alphabet))
+        characters.append(alphabet[index])
+    return ''.join(reversed(characters))
+
+
+def next_delivery_code():
+    """
+    Returns a new delivery code without querying existing codes.
+
+    Codes are sequence values scrambled with the sequence's secret key, so they are unique by
+    construction and consecutive deliveries get unrelated codes.
+    """
+    domain = len(DELIVERY_CODE_ALPHABET) ** DELIVERY_CODE_LENGTH
+    value, key = allocator.next('delivery_code', DELIVERY_CODE_BLOCK_SIZE)
+    if value >= domain:
+        raise RuntimeError('Delivery code space exhausted')
+    return encode(scramble(value, key, domain))
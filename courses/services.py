@@ -0,0 +1,228 @@
+import logging
+import re
+import time
+import uuid
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+import rustici_software_cloud_v2 as scorm_cloud
+
+from api.utils import course_id_is_valid
+from . import clients, sequences
+from .models import CourseDeletionJob, CourseImportJob, ScormCloudCourse, ScormCloudOutbox, ScormCloudRegistration, Sequence
+from .packages import inspect_package, package_digest
+from .resilience import ScormCloudUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Course details an import job may carry over to the ScormCloudCourse it creates
+COURSE_IMPORT_FIELDS = ('category', 'duration', 'short_description', 'long_description')
+
+# Namespace for the deterministic registration ids handed to ScormCloud
+REGISTRATION_NAMESPACE = uuid.UUID('6f1c4a52-9d3e-4b8f-a0d2-5c7e8b1f3a94')
+# Rate-limited registration calls are retried with exponential backoff (seconds)
+RATE_LIMIT_BACKOFF = 1
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+def _course_id_sequence(tenant=None):
+    app_id, _ = clients.get_credentials(tenant)
+    return f"course_id:{app_id}"
+
+
+def _next_unused_course_number():
+    """Scans existing course ids once, to start a new course id sequence above them."""
+    highest = 0
+    for manager in (ScormCloudCourse.all_objects, CourseImportJob.objects):
+        max_course_id = manager.aggregate(Max('course_id'))['course_id__max']
+        if max_course_id and re.search(r'\d+', max_course_id):
+            highest = max(highest, int(re.search(r'\d+', max_course_id).group()))
+    return highest + 1
+
+
+def format_course_id(number):
+    return f"COURSE-{number:06d}"
+
+
+def preview_course_id(tenant=None):
+    """
+    The id the next allocation will most likely return, for display only.
+
+    Reads the tenant's sequence row, creating it on first use, so existing courses are scanned
+    only once. Another upload may still take this id first, so ids are only reserved by
+    allocate_course_ids.
+    """
+    sequence, _ = Sequence.objects.get_or_create(
+        name=_course_id_sequence(tenant),
+        defaults={'next_value': _next_unused_course_number},
+    )
+    return format_course_id(sequence.next_value)
+
+
+def allocate_course_ids(count=1, tenant=None):
+    """
+    Atomically reserves the next ``count`` COURSE-NNNNNN ids of the tenant's sequence.
+
+    Concurrent callers always get distinct ids. Ids reserved for uploads that are never
+    imported are skipped, not reissued, as are ids a client already chose for itself through
+    the API.
+    """
+    course_ids = []
+    while len(course_ids) < count:
+        numbers, _ = sequences.allocator.lease(_course_id_sequence(tenant), count - len(course_ids), start=_next_unused_course_number)
+        reserved = [format_course_id(number) for number in numbers]
+        taken = set(ScormCloudCourse.all_objects.filter(course_id__in=reserved).values_list('course_id', flat=True))
+        taken.update(CourseImportJob.objects.filter(course_id__in=reserved).values_list('course_id', flat=True))
+        course_ids.extend(course_id for course_id in reserved if course_id not in taken)
+    return course_ids
+
+
+def queue_course_import(course_id, package, course_fields=None, cover_image=None, published_by=None):
+    """
+    Validates an uploaded SCORM package and queues it for import by the course job worker.
+
+    Packages are deduplicated by SHA-256. Content already imported is linked to its course
+    with an immediately complete job instead of being imported again, and new content for an
+    existing ``course_id`` is imported as a new ScormCloud version of that course.
+
+    ``package`` is saved once to media storage; uploads Django already spooled to disk
+    are moved rather than copied. Raises ValueError if the course can't be imported.
+    """
+    if not course_id_is_valid(course_id):
+        raise ValueError('Invalid course ID format')
+    if not package:
+        raise ValueError('Course file is required')
+    if CourseImportJob.objects.filter(course_id=course_id, status__in=['PENDING', 'RUNNING']).exists():
+        raise ValueError('An import for this course ID is already in progress.')
+    if ScormCloudCourse.all_objects.filter(course_id=course_id, deleted_at__isnull=False).exists():
+        raise ValueError('This course is being deleted.')
+
+    course_fields = {
+        field: value for field, value in (course_fields or {}).items()
+        if field in COURSE_IMPORT_FIELDS and value
+    }
+    # Reject malformed packages before they are stored or sent to ScormCloud
+    course_fields.update(inspect_package(package))
+    digest = package_digest(package)
+
+    course = ScormCloudCourse.objects.filter(course_id=course_id).first()
+    if course is None or course.package_sha256 == digest:
+        duplicate = course or ScormCloudCourse.objects.filter(package_sha256=digest).order_by('pk').first()
+        if duplicate is not None:
+            logger.info(f"Package for {course_id} is identical to course {duplicate.course_id}; linking instead of importing.")
+            return CourseImportJob.objects.create(
+                course_id=duplicate.course_id,
+                status='COMPLETE',
+                package_sha256=digest,
+                message=f"Identical package already imported as {duplicate.course_id}",
+                created_by=published_by,
+            )
+        in_flight = CourseImportJob.objects.filter(package_sha256=digest, status__in=['PENDING', 'RUNNING']).first()
+        if in_flight is not None:
+            logger.info(f"Package for {course_id} is already being imported by job {in_flight.id}.")
+            return in_flight
+
+    job = CourseImportJob.objects.create(
+        course_id=course_id,
+        package=package,
+        package_sha256=digest,
+        course_fields=course_fields,
+        cover_image=cover_image or None,
+        created_by=published_by,
+    )
+    if course is not None:
+        logger.info(f"Queued import job {job.id} for a new version of course {course_id}.")
+    else:
+        logger.info(f"Queued import job {job.id} for course {course_id}.")
+    return job
+
+
+def registration_id_for(learner, course_id):
+    """
+    Deterministic registration id for a learner on a course.
+
+    Retrying a registration after a crash or timeout reuses the same id, so it can never
+    leave a second, orphaned registration on ScormCloud.
+    """
+    return uuid.uuid5(REGISTRATION_NAMESPACE, f"{course_id}:{learner.pk}")
+
+
+def _retry_delay(error, attempt):
+    retry_after = error.headers.get('Retry-After') if error.headers else None
+    if retry_after and retry_after.isdigit():
+        return int(retry_after)
+    return RATE_LIMIT_BACKOFF * 2 ** attempt
+
+
+def create_remote_registration(registration_api, learner, course_id, registration_id):
+    """
+    Creates the registration on ScormCloud, backing off when rate limited.
+
+    A client error for an id that already exists remotely (left by an interrupted earlier
+    attempt) counts as success.
+    """
+    registration = scorm_cloud.CreateRegistrationSchema(
+        course_id=course_id,
+        learner=scorm_cloud.LearnerSchema(
+            id=str(learner.user.id),
+            first_name=learner.user.first_name,
+            last_name=learner.user.last_name
+        ),
+        registration_id=str(registration_id),
+    )
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        try:
+            registration_api.create_registration(registration)
+            return
+        except scorm_cloud.rest.ApiException as e:
+            if e.status in (429, 503) and not isinstance(e, ScormCloudUnavailable) and attempt < MAX_RATE_LIMIT_RETRIES:
+                time.sleep(_retry_delay(e, attempt))
+                continue
+            if e.status and 400 <= e.status < 500:
+                try:
+                    registration_api.get_registration(str(registration_id))
+                    return
+                except scorm_cloud.rest.ApiException:
+                    pass
+            raise
+
+
+def register_learner(learner, course_id):
+    """
+    Registers ``learner`` on ``course_id``.
+
+    The local registration and a ScormCloudOutbox entry for its remote creation are written
+    in one transaction; the course job worker delivers it to ScormCloud. Raises ValueError if
+    the learner is already registered.
+    """
+    registration_id = registration_id_for(learner, course_id)
+    with transaction.atomic():
+        registration, created = ScormCloudRegistration.objects.get_or_create(
+            learner=learner,
+            course_id=course_id,
+            defaults={'registration_id': registration_id},
+        )
+        if not created:
+            raise ValueError('Learner is already registered for this course.')
+        ScormCloudOutbox.objects.create(operation='create_registration', registration_id=registration_id)
+    logger.info(f"Registration for learner {learner.pk} and course {course_id} queued for ScormCloud.")
+    return registration
+
+
+def delete_course(course_id, requested_by=None):
+    """
+    Tombstones a course so it disappears at once and queues a CourseDeletionJob to remove it
+    from ScormCloud, along with its registrations and deliveries. Raises
+    ScormCloudCourse.DoesNotExist if there is no such course or it is already being deleted,
+    and ValueError while a new version of the course is being imported.
+    """
+    with transaction.atomic():
+        course = ScormCloudCourse.objects.select_for_update().get(course_id=course_id)
+        if CourseImportJob.objects.filter(course_id=course_id, status__in=['PENDING', 'RUNNING']).exists():
+            raise ValueError('This course has an import in progress; delete it once the import finishes.')
+        course.deleted_at = timezone.now()
+        course.save(update_fields=['deleted_at'])
+        job = CourseDeletionJob.objects.create(course_id=course_id, created_by=requested_by)
+    logger.info(f"Course {course_id} tombstoned; deletion job {job.pk} queued.")
+    return job
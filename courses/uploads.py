@@ -0,0 +1,224 @@
+import hashlib
+import logging
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import CourseUpload
+from .services import queue_course_import
+
+logger = logging.getLogger(__name__)
+
+# Bytes copied from the request or the part file per read, so a package is never held in memory
+UPLOAD_READ_SIZE = 1024 * 1024
+# Unfinished uploads idle for this long are discarded by the course job worker
+UPLOAD_EXPIRY = timedelta(days=1)
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class OffsetMismatch(ValueError):
+    """A chunk would leave a gap after the bytes received so far."""
+
+    def __init__(self, received):
+        super().__init__(f"Chunk must start at or before offset {received}")
+        self.received = received
+
+
+class AssembledPackage(File):
+    """A fully received upload on local disk; storage moves it into place instead of copying it."""
+
+    def __init__(self, file, name=None, sha256=None):
+        super().__init__(file, name)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class HashingUploadMixin:
+    """Hashes each uploaded file as its chunks stream in and exposes the digest as ``file.sha256``."""
+
+    def new_file(self, *args, **kwargs):
+        self._digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if getattr(self, 'activated', True):
+            self._digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self._digest.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(UPLOAD_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _normalize_sha256(sha256):
+    sha256 = (sha256 or '').strip().lower()
+    if sha256 and not SHA256_PATTERN.match(sha256):
+        raise ValueError('sha256 must be a 64 character hex digest')
+    return sha256
+
+
+def start_upload(filename, size, sha256='', created_by=None):
+    """Registers a new resumable upload and creates its empty part file."""
+    filename = os.path.basename(filename or '')
+    if not filename.lower().endswith('.zip'):
+        raise ValueError('Course packages must be .zip files')
+    if size <= 0 or size > settings.COURSE_UPLOAD_MAX_SIZE:
+        raise ValueError(f"Upload size must be between 1 and {settings.COURSE_UPLOAD_MAX_SIZE} bytes")
+
+    upload = CourseUpload.objects.create(
+        filename=filename,
+        size=size,
+        sha256=_normalize_sha256(sha256),
+        created_by=created_by,
+    )
+    os.makedirs(settings.COURSE_UPLOAD_DIR, exist_ok=True)
+    open(upload.path, 'wb').close()
+    logger.info(f"Started upload {upload.id} of {filename} ({size} bytes).")
+    return upload
+
+
+def write_chunk(upload_id, offset, stream, length, created_by):
+    """
+    Streams ``length`` bytes from ``stream`` into the part file at ``offset`` of an upload
+    started by ``created_by``; anyone else's upload raises CourseUpload.DoesNotExist.
+
+    A chunk may overlap bytes already received (a client resending after a dropped
+    connection) but may not leave a gap. Returns the upload with its new ``received`` offset.
+    """
+    upload = CourseUpload.objects.get(pk=upload_id, created_by=created_by)
+    if upload.status != 'UPLOADING':
+        raise ValueError('Upload is already complete')
+    if offset < 0 or offset > upload.received:
+        raise OffsetMismatch(upload.received)
+    if offset + length > upload.size:
+        raise ValueError('Chunk extends past the declared upload size')
+
+    # The body arrives at the client's pace, so no row lock or transaction is held while it streams
+    remaining = length
+    with open(upload.path, 'r+b') as f:
+        f.seek(offset)
+        while remaining:
+            data = stream.read(min(UPLOAD_READ_SIZE, remaining))
+            if not data:
+                break
+            f.write(data)
+            remaining -= len(data)
+
+    # Only advance the offset if no concurrent chunk or completion moved the upload on meanwhile;
+    # the offset never goes backwards when overlapping chunks finish out of order
+    updated = CourseUpload.objects.filter(pk=upload.pk, status='UPLOADING', received__gte=offset).update(
+        received=Greatest(F('received'), offset + length - remaining),
+        updated_at=timezone.now(),
+    )
+    upload.refresh_from_db(fields=['received', 'status', 'updated_at'])
+    if not updated:
+        if upload.status != 'UPLOADING':
+            raise ValueError('Upload is already complete')
+        raise OffsetMismatch(upload.received)
+    return upload
+
+
+def complete_upload(upload_id, course_id, published_by, sha256='', course_fields=None, cover_image=None):
+    """
+    Verifies a fully received upload against its SHA-256 and queues it for import, published
+    by ``published_by``. Only the user who started the upload may complete it; anyone else's
+    upload raises CourseUpload.DoesNotExist.
+
+    The part file is moved into media storage as the import job's package, or removed if
+    the package matched an existing import. Raises
+    ValueError if the upload is incomplete, the checksum doesn't match or the course
+    can't be imported; the upload stays resumable in every case.
+    """
+    upload = CourseUpload.objects.get(pk=upload_id, created_by=published_by)
+    expected = _normalize_sha256(sha256) or upload.sha256
+    if not expected:
+        raise ValueError('A sha256 checksum is required to complete the upload')
+
+    # Claim the upload with a single conditional update rather than a row lock, so hashing and
+    # moving the package never happen inside a transaction and a second completion is refused
+    claimed = CourseUpload.objects.filter(pk=upload.pk, status='UPLOADING', received=F('size')).update(
+        status='VERIFYING',
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        upload.refresh_from_db(fields=['received', 'status'])
+        if upload.status != 'UPLOADING':
+            raise ValueError('Upload is already complete')
+        raise ValueError(f"Upload incomplete: {upload.received} of {upload.size} bytes received")
+
+    try:
+        digest = _file_digest(upload.path)
+        if digest != expected:
+            raise ValueError('Checksum mismatch; resend the package from offset 0')
+
+        with AssembledPackage(open(upload.path, 'rb'), name=upload.filename, sha256=digest) as package:
+            job = queue_course_import(
+                course_id,
+                package,
+                course_fields=course_fields,
+                cover_image=cover_image,
+                published_by=published_by,
+            )
+    except BaseException:
+        CourseUpload.objects.filter(pk=upload.pk, status='VERIFYING').update(status='UPLOADING', updated_at=timezone.now())
+        raise
+
+    CourseUpload.objects.filter(pk=upload.pk).update(
+        sha256=digest,
+        status='COMPLETE',
+        import_job=job,
+        updated_at=timezone.now(),
+    )
+    # The part file is only moved into storage when a new import was queued; an in-flight or
+    # deduplicated import leaves it behind, and nothing else would ever remove it
+    try:
+        os.remove(upload.path)
+    except FileNotFoundError:
+        pass
+    logger.info(f"Upload {upload.id} verified and queued as import job {job.id}.")
+    return job
+
+
+def expire_stale_uploads(limit=50):
+    """
+    Discards unfinished uploads that have been idle longer than UPLOAD_EXPIRY, including ones
+    left VERIFYING by a process that died while hashing or queueing them.
+    """
+    cutoff = timezone.now() - UPLOAD_EXPIRY
+    stale = list(CourseUpload.objects.filter(status__in=['UPLOADING', 'VERIFYING'], updated_at__lt=cutoff)[:limit])
+    for upload in stale:
+        try:
+            os.remove(upload.path)
+        except FileNotFoundError:
+            pass
+        logger.info(f"Discarding stale upload {upload.id} of {upload.filename}.")
+        upload.delete()
+    return len(stale)
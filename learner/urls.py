@@ -19,6 +19,7 @@ urlpatterns = [
     path('enrolled_courses/', views.enrolled_courses, name='learner_enrolled_courses'),
     path('play_course/', views.play_course, name='learner_play_course'),
     path('launch_course/', views.launch_course, name='learner_launch_course'),
+    path('registrations/<uuid:registration_id>/exit/', views.registration_exit, name='learner_registration_exit'),
 
     path('support/', views.support, name='learner_support'),
 ]
\ No newline at end of file
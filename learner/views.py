@@ -1,5 +1,4 @@
 # Standard library imports
-from datetime import datetime
 import logging
 
 # Third-party imports
@@ -8,7 +7,8 @@ from django.conf import settings as django_settings
 from django.contrib.auth.decorators import login_required
 from django.http import Http404, HttpResponseServerError, JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
-import pytz
+from django.urls import reverse
+from django.views.decorators.clickjacking import xframe_options_sameorigin
 import requests
 
 # Local application/library specific imports
@@ -16,6 +16,8 @@ from accounts.forms import UserTimeZoneForm
 from accounts.models import Learner
 from learner.forms import LearnerForm, LearnerNameForm, LearnerEmailForm, LearnerProfilePictureForm
 from courses.models import CourseDelivery, ScormCloudCourse, ScormCloudRegistration
+from courses.enrollment import enrolled_deliveries_page
+from courses.progress import refresh_registration_progress
 
 # Configure the logger
 logger = logging.getLogger(__name__)
@@ -123,40 +125,34 @@ def learner_settings(request):
 @login_required
 def enrolled_courses(request):
     learner = request.user.learner
-    learner_timezone = pytz.timezone(learner.user.timezone)
-
-    enrolled_deliveries = CourseDelivery.objects.filter(participants=learner)
-
-    for delivery in enrolled_deliveries:
-        creator_timezone = pytz.timezone(delivery.timezone)
-
-        # Create datetime objects in the creator's timezone
-        start_datetime = creator_timezone.localize(datetime.combine(delivery.start_date, delivery.start_time))
-        end_datetime = creator_timezone.localize(datetime.combine(delivery.end_date, delivery.end_time))
-
-        # Convert to learner's timezone
-        delivery.start_datetime_local = start_datetime.astimezone(learner_timezone)
-        delivery.end_datetime_local = end_datetime.astimezone(learner_timezone)
-
-        if delivery.deactivation_date and delivery.deactivation_time:
-            deactivation_datetime = creator_timezone.localize(datetime.combine(delivery.deactivation_date, delivery.deactivation_time))
-            delivery.deactivation_datetime_local = deactivation_datetime.astimezone(learner_timezone)
-        else:
-            delivery.deactivation_datetime_local = None
-
-        delivery.start_datetime_raw = delivery.start_datetime_local
-        delivery.end_datetime_raw = delivery.end_datetime_local
-
-        print(f"Start Datetime (Creator's TZ): {start_datetime}")
-        print(f"Start Datetime (Learner's TZ): {delivery.start_datetime_local}")
+    # Schedules are stored in UTC; the template converts them to the learner's timezone
+    page = enrolled_deliveries_page(learner, request.GET.get('page', 1))
 
     return render(request, 'learner/enrolled_deliveries.html', {
-        'enrolled_deliveries': enrolled_deliveries,
-        'learner_timezone': learner_timezone,
+        'enrolled_deliveries': page.object_list,
+        'page_obj': page,
+        'learner_timezone': learner.user.timezone,
         'learner': learner,
     })
 
 
+@xframe_options_sameorigin
+@login_required
+def registration_exit(request, registration_id):
+    """
+    ScormCloud sends the learner here on leaving the player. That registration's progress is
+    refreshed, so the enrolled courses page shows where the learner left off.
+
+    The redirect arrives inside the player's iframe, so this renders a frameable page that
+    sends the top window on: learners to their enrolled courses, staff previewing a course
+    back to the course list.
+    """
+    if ScormCloudRegistration.objects.filter(registration_id=registration_id, learner__user=request.user).exists():
+        refresh_registration_progress(registration_id)
+    next_url = reverse('course_list' if request.user.is_staff else 'learner_enrolled_courses')
+    return render(request, 'learner/registration_exit.html', {'next_url': next_url})
+
+
 def launch_course(request):
     return render(request, 'learner/launch_course.html')
 
@@ -180,7 +176,7 @@ def play_course(request):
         course = get_object_or_404(ScormCloudCourse, id=delivery.course.id)
 
         # Validate and fetch the ScormCloudRegistration object
-        registration = get_object_or_404(ScormCloudRegistration, learner=learner, course_id=course.course_id)
+        registration = get_object_or_404(ScormCloudRegistration, learner=learner, course=course)
 
         # Prepare context data for rendering
         context = {
@@ -162,6 +162,14 @@ AUTH_USER_MODEL = 'accounts.User'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Partially received chunked course package uploads, and the largest package accepted
+COURSE_UPLOAD_DIR = os.getenv('COURSE_UPLOAD_DIR', os.path.join(BASE_DIR, 'course_uploads'))
+COURSE_UPLOAD_MAX_SIZE = int(os.getenv('COURSE_UPLOAD_MAX_SIZE', 2 * 1024 ** 3))
+# Uploads are hashed as they stream in so course packages can be deduplicated without rereading them
+FILE_UPLOAD_HANDLERS = [
+    'courses.uploads.HashingMemoryFileUploadHandler',
+    'courses.uploads.HashingTemporaryFileUploadHandler',
+]
 
 LOGGING = {
     'version': 1,
@@ -181,6 +189,18 @@ LOGGING = {
 
 CLOUDSCORM_APP_ID = os.getenv('CLOUDSCORM_APP_ID')
 CLOUDSCORM_SECRET_KEY = os.getenv('CLOUDSCORM_SECRET_KEY')
+# Overrides the ScormCloud API base URL, e.g. to point at `manage.py run_fake_scorm_cloud`
+CLOUDSCORM_HOST = os.getenv('CLOUDSCORM_HOST')
+# Maximum keep-alive connections per ScormCloud credential set
+CLOUDSCORM_POOL_MAXSIZE = int(os.getenv('CLOUDSCORM_POOL_MAXSIZE', 10))
+# HTTP basic credentials ScormCloud must send with registration postbacks
+CLOUDSCORM_POSTBACK_USERNAME = os.getenv('CLOUDSCORM_POSTBACK_USERNAME')
+CLOUDSCORM_POSTBACK_PASSWORD = os.getenv('CLOUDSCORM_POSTBACK_PASSWORD')
+# Concurrent ScormCloud calls used when bulk-registering a delivery's participants or relaying the outbox
+CLOUDSCORM_ENROLLMENT_CONCURRENCY = int(os.getenv('CLOUDSCORM_ENROLLMENT_CONCURRENCY', 8))
+# Per-process launch link LRU size, and an optional CACHES alias to share links across workers
+LAUNCH_LINK_CACHE_SIZE = int(os.getenv('LAUNCH_LINK_CACHE_SIZE', 1024))
+LAUNCH_LINK_CACHE_ALIAS = os.getenv('LAUNCH_LINK_CACHE_ALIAS')
 
 DOMAIN_NAME = os.getenv('DOMAIN_NAME')
 